@@ -0,0 +1,110 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Optional
+
+from config.config import Config
+from generator.ppt_generator import generate_presentation
+from layout.layout_discovery import build_layout_manager
+from layout.layout_manager import LayoutManager
+from parser.input_parser import parse_input_text
+from template.template_manager import template_cache
+from utils.logger import LOG
+
+# 每个工作进程内只初始化一次的配置与布局管理器
+_worker_config: Optional[Config] = None
+_worker_layout_manager: Optional[LayoutManager] = None
+
+
+@dataclass
+class DeckResult:
+    input_file: str  # 输入的 markdown 文件
+    output_file: Optional[str] = None  # 生成的 pptx 文件
+    seconds: float = 0.0  # 转换耗时
+    slides: int = 0  # 幻灯片数量
+    error: Optional[str] = None  # 失败原因
+
+
+def collect_inputs(pattern: str) -> List[str]:
+    """目录时收集其中所有 .md 文件，否则按 glob 模式匹配。"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '**', '*.md')
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+def init_worker(config_file: str = 'config.json'):
+    """工作进程初始化：加载配置、布局管理器，并预热模板缓存。"""
+    global _worker_config, _worker_layout_manager
+    _worker_config = Config(config_file)
+    _worker_layout_manager = build_layout_manager(_worker_config)
+    template_cache.digest(_worker_config.ppt_template)
+
+
+def output_path(input_file: str, root: str, output_dir: str) -> str:
+    """
+    输出文件按输入文件相对批量根目录的路径命名（decks/a/intro.md -> outputs/a/intro.pptx），
+    不同子目录中的同名文件和同名标题都不会互相覆盖。
+    """
+    relative = os.path.splitext(os.path.relpath(input_file, root))[0]
+    return os.path.join(output_dir, f"{relative}.pptx")
+
+
+def convert_deck(input_file: str, output_pptx: str) -> DeckResult:
+    """在工作进程中转换一个 markdown 文件。"""
+    if _worker_config is None:
+        init_worker()
+    result = DeckResult(input_file=input_file)
+    started = time.perf_counter()
+    try:
+        with open(input_file, 'r', encoding='utf-8') as file:
+            input_text = file.read()
+        powerpoint_data, _ = parse_input_text(input_text, _worker_layout_manager)
+        os.makedirs(os.path.dirname(output_pptx) or '.', exist_ok=True)
+        generate_presentation(powerpoint_data, _worker_config.ppt_template, output_pptx)
+        result.output_file = output_pptx
+        result.slides = len(powerpoint_data.slides)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_batch(pattern: str, output_dir: str = 'outputs', workers: Optional[int] = None,
+              config_file: str = 'config.json') -> List[DeckResult]:
+    """
+    批量转换：把匹配到的 markdown 文件分发到进程池中并行转换，
+    进程数默认等于 CPU 核数，最后打印每个文件的耗时、失败项与整体吞吐。
+    """
+    inputs = collect_inputs(pattern)
+    if not inputs:
+        LOG.error(f"'{pattern}' 没有匹配到任何 markdown 文件。")
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in inputs])
+    workers = min(workers or os.cpu_count() or 1, len(inputs))
+    LOG.info(f"批量转换 {len(inputs)} 个文件，使用 {workers} 个进程")
+
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(config_file,)) as pool:
+        futures = [pool.submit(convert_deck, input_file, output_path(os.path.abspath(input_file), root, output_dir))
+                   for input_file in inputs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    elapsed = time.perf_counter() - started
+
+    print_summary(sorted(results, key=lambda r: r.input_file), elapsed)
+    return results
+
+
+def print_summary(results: List[DeckResult], elapsed: float):
+    failed = [r for r in results if r.error]
+    print(f"\n{'输入文件':<50} {'幻灯片':>6} {'耗时(s)':>8}  结果")
+    for r in results:
+        status = f"失败: {r.error}" if r.error else r.output_file
+        print(f"{r.input_file:<50} {r.slides:>6} {r.seconds:>8.3f}  {status}")
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(f"\n共 {len(results)} 个，成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个，"
+          f"总耗时 {elapsed:.2f}s，{rate:.2f} 个/秒")
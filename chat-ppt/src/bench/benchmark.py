@@ -0,0 +1,170 @@
+# chat-ppt 流水线基准测试：合成不同规模的 markdown，测量解析、布局分配、渲染与保存各阶段的耗时、
+# 峰值内存和输出大小，结果写入 JSON 文件，便于不同提交之间对比。
+# 在 src 目录下运行：python -m bench.benchmark --sizes 10 100 1000
+import argparse
+import cProfile
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional
+
+from config.config import Config
+from generator.ppt_generator import render_presentation
+from image.image_processor import ImageProcessor
+from layout.layout_discovery import build_layout_manager
+from layout.layout_manager import LayoutManager
+from parser.input_parser import parse_input_text
+from template.template_manager import template_cache
+from utils.logger import LOG
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+SCENARIOS = ["plain", "images", "long_bullets"]
+
+# 合成幻灯片中引用的不同图片数量（其余引用重复使用，体现去重效果）
+DISTINCT_IMAGES = 8
+
+
+def make_images(directory: str, count: int = DISTINCT_IMAGES) -> List[str]:
+    """生成几张较大的测试图片，模拟相机拍摄的大图。"""
+    from PIL import Image
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.png")
+        image = Image.new('RGB', (2400, 1600), ((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def synthesize_markdown(slides: int, scenario: str, images: List[str]) -> str:
+    lines = [f"# Benchmark {scenario} {slides}", ""]
+    bullets = 12 if scenario == "long_bullets" else 3
+    for n in range(1, slides):
+        lines.append(f"## 第 {n} 页")
+        # 每隔几页放一张只有标题的幻灯片，覆盖所有布局
+        if n % 7 != 0:
+            for b in range(bullets):
+                text = f"要点 {b}：" + ("这是一条较长的说明文字，" * (8 if scenario == "long_bullets" else 1))
+                lines.append(f"- {text}")
+        if scenario == "images" and n % 2 == 0:
+            lines.append(f"![图片]({images[n % len(images)]})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def measure(stage: str, fn: Callable[[], Any], memory: bool, profile_dir: Optional[str], label: str) -> tuple:
+    """执行一个阶段，返回 (结果, 指标)。"""
+    profiler = cProfile.Profile() if profile_dir else None
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = fn()
+    finally:
+        if profiler:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+    if profiler:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(profile_dir, f"{label}-{stage}.prof"))
+    metrics = {"seconds": round(seconds, 4)}
+    if peak is not None:
+        metrics["peak_memory_mb"] = round(peak / 1024 / 1024, 2)
+    return result, metrics
+
+
+def run_case(config: Config, layout_manager: LayoutManager, slides: int, scenario: str, images: List[str],
+             work_dir: str, memory: bool, profile_dir: Optional[str]) -> Dict[str, Any]:
+    label = f"{scenario}-{slides}"
+    markdown = synthesize_markdown(slides, scenario, images)
+    # 每个用例使用独立的图片缓存目录，避免前一个用例的处理结果影响测量
+    image_processor = ImageProcessor(cache_dir=os.path.join(work_dir, f"image-cache-{label}"))
+    stages = {}
+
+    (powerpoint_data, _), stages["parse"] = measure(
+        "parse", lambda: parse_input_text(markdown, layout_manager), memory, profile_dir, label)
+    contents = [slide.content for slide in powerpoint_data.slides]
+    _, stages["assign_layout"] = measure(
+        "assign_layout", lambda: [layout_manager.assign_layout(c) for c in contents], memory, profile_dir, label)
+    prs, stages["render"] = measure(
+        "render", lambda: render_presentation(powerpoint_data, config.ppt_template, image_processor),
+        memory, profile_dir, label)
+    buffer = BytesIO()
+    _, stages["save"] = measure("save", lambda: prs.save(buffer), memory, profile_dir, label)
+
+    total = sum(stage["seconds"] for stage in stages.values())
+    return {
+        "scenario": scenario,
+        "slides": len(powerpoint_data.slides),
+        "markdown_bytes": len(markdown.encode('utf-8')),
+        "output_bytes": buffer.getbuffer().nbytes,
+        "total_seconds": round(total, 4),
+        "slides_per_second": round(len(powerpoint_data.slides) / total, 2) if total > 0 else 0.0,
+        "stages": stages,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='chat-ppt 流水线基准测试。')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='幻灯片数量（默认: 10 100 1000 10000）')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS, help='测试场景')
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存（tracemalloc 会拖慢执行）')
+    parser.add_argument('--profile-dir', default=None, help='为每个阶段输出 cProfile 文件（可用 snakeviz 等生成火焰图）')
+    parser.add_argument('--output', default='bench_results.json', help='结果输出文件（默认: bench_results.json）')
+    parser.add_argument('--verbose', action='store_true', help='保留 DEBUG 日志（默认只输出警告，避免日志开销干扰测量）')
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        LOG.remove()
+        LOG.add(sys.stderr, level="WARNING")
+
+    config = Config()
+    layout_manager = build_layout_manager(config)
+    template_cache.digest(config.ppt_template)  # 模板加载不计入各用例
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="chatppt-bench-") as work_dir:
+        images = make_images(work_dir) if "images" in args.scenarios else []
+        for scenario in args.scenarios:
+            for size in args.sizes:
+                result = run_case(config, layout_manager, size, scenario, images, work_dir,
+                                  not args.no_memory, args.profile_dir)
+                results.append(result)
+                stages = "  ".join(f"{name} {stage['seconds']:.3f}s" for name, stage in result["stages"].items())
+                print(f"[基准] {scenario:<13} {result['slides']:>6} 张  {stages}  "
+                      f"输出 {result['output_bytes'] / 1024:.0f} KB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "memory_tracked": not args.no_memory,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"[基准] 结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -29,5 +29,5 @@ class Config:
             # 加载 PPT 默认模板
             self.ppt_template = config.get('ppt_template', "templates/MasterTemplate.pptx")
 
-            # 加载布局映射
+            # 加载布局映射（可选）：布局默认从模板自动识别，这里的配置会覆盖识别结果
             self.layout_mapping = config.get('layout_mapping', {})
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import List, Optional
+
+from pptx import Presentation
+from generator.ppt_generator import render_presentation, render_slide
+from image.image_processor import ImageProcessor, image_processor as default_image_processor
+from structure.data_structures import PowerPoint, Slide
+from template.template_manager import template_cache
+from utils.util import resolve_image_path
+from utils.logger import LOG
+
+# 缓存格式或渲染逻辑变化时递增，旧缓存自动失效
+CACHE_VERSION = 1
+
+
+def sidecar_path(output_path: str) -> Path:
+    """记录上一次构建的幻灯片哈希，与输出文件放在同一目录。"""
+    path = Path(output_path)
+    return path.parent / f".{path.name}.chatppt-cache.json"
+
+
+def slide_hash(slide: Slide, cwd: str, image_processor: ImageProcessor) -> str:
+    """幻灯片内容的哈希：布局、标题、要点、图片路径以及图片内容。"""
+    image_digest = None
+    if slide.content.image_path:
+        image_full_path = resolve_image_path(slide.content.image_path, cwd)
+        image_digest = image_processor.digest(image_full_path) if image_full_path else None
+    payload = json.dumps([slide.layout_id, slide.content.title, slide.content.bullet_points,
+                          slide.content.image_path, image_digest], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _load_sidecar(output_path: str) -> Optional[dict]:
+    path = sidecar_path(output_path)
+    if not path.exists() or not os.path.exists(output_path):
+        return None
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except ValueError:
+        return None
+
+
+def _save(prs, output_path: str, signature: str, title: str, hashes: List[str]):
+    # 先写临时文件再替换，避免中途失败留下损坏的输出
+    tmp = f"{output_path}.tmp"
+    prs.save(tmp)
+    os.replace(tmp, output_path)
+    sidecar = sidecar_path(output_path)
+    sidecar.write_text(json.dumps({"signature": signature, "title": title, "slides": hashes}), encoding='utf-8')
+
+
+def incremental_generate(powerpoint_data, template_path: str, output_path: str,
+                         image_processor: ImageProcessor = None) -> dict:
+    """
+    增量生成演示文稿：按幻灯片内容哈希与上一次构建比较，
+    在已有的输出文件中保留未变化的幻灯片，只渲染新增或修改的幻灯片、删除多余的幻灯片，并调整顺序。
+    模板、图片处理参数变化或没有上一次的构建记录时完整重建。返回本次重用、渲染、删除的幻灯片数量。
+    """
+    image_processor = image_processor or default_image_processor
+    cwd = os.getcwd()
+    template_key = template_cache.digest(template_path)
+    slides = list(powerpoint_data.slides)
+    title = powerpoint_data.title
+    hashes = [slide_hash(slide, cwd, image_processor) for slide in slides]
+    signature = f"{CACHE_VERSION}:{template_key}:{image_processor.dpi}:{image_processor.jpeg_quality}"
+
+    cache = _load_sidecar(output_path)
+    if cache and cache.get("signature") == signature and cache.get("slides") == hashes \
+            and cache.get("title") == title:
+        LOG.info(f"幻灯片内容未变化，跳过生成 '{output_path}'")
+        return {"reused": len(hashes), "rendered": 0, "removed": 0, "full": False}
+
+    prs = None
+    if cache and cache.get("signature") == signature:
+        prs = Presentation(output_path)
+        if len(prs.slides) != len(cache.get("slides", [])):
+            LOG.warning("输出文件与构建记录不一致，完整重建。")
+            prs = None
+
+    if prs is None:
+        prs = render_presentation(PowerPoint(title=title, slides=slides), template_path, image_processor)
+        _save(prs, output_path, signature, title, hashes)
+        LOG.info(f"演示文稿已完整生成到 '{output_path}'")
+        return {"reused": 0, "rendered": len(slides), "removed": 0, "full": True}
+
+    sld_id_lst = prs.slides._sldIdLst
+    # 上一次构建中每个哈希对应的幻灯片，内容相同的幻灯片按顺序依次复用
+    available = defaultdict(deque)
+    for sld_id, old_hash in zip(list(sld_id_lst.sldId_lst), cache["slides"]):
+        available[old_hash].append(sld_id)
+
+    order = []
+    rendered = 0
+    for slide, new_hash in zip(slides, hashes):
+        if available[new_hash]:
+            order.append(available[new_hash].popleft())
+        else:
+            render_slide(prs, slide, template_key, cwd, image_processor)
+            order.append(sld_id_lst.sldId_lst[-1])
+            rendered += 1
+
+    # 删除不再需要的幻灯片，连同关系一起删除，保存时不再写入这些幻灯片
+    removed = [sld_id for queue in available.values() for sld_id in queue]
+    for sld_id in removed:
+        sld_id_lst.remove(sld_id)
+        prs.part.drop_rel(sld_id.rId)
+
+    # 按新的顺序排列幻灯片
+    for sld_id in order:
+        sld_id_lst.remove(sld_id)
+        sld_id_lst.append(sld_id)
+
+    prs.core_properties.title = title
+    _save(prs, output_path, signature, title, hashes)
+    report = {"reused": len(order) - rendered, "rendered": rendered, "removed": len(removed), "full": False}
+    LOG.info(f"演示文稿已增量更新到 '{output_path}': {report}")
+    return report
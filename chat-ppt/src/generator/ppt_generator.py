@@ -1,61 +1,98 @@
 import os
-from pptx import Presentation
-from utils.util import remove_all_slides
+from typing import Dict, Optional
+from image.image_processor import ImageProcessor, image_processor as default_image_processor
+from layout.placeholder_index import placeholder_index
+from template.template_manager import template_cache
+from utils.util import resolve_image_path
 from utils.logger import LOG  # 引入日志模块
 
 # 生成 PowerPoint 演示文稿
 def generate_presentation(powerpoint_data, template_path: str, output_path: str):
-    # 检查模板文件是否存在
-    if not os.path.exists(template_path):
-        LOG.error(f"模板文件 '{template_path}' 不存在。")  # 记录错误日志
-        raise FileNotFoundError(f"模板文件 '{template_path}' 不存在。")
+    prs = render_presentation(powerpoint_data, template_path)
+
+    # 保存生成的 PowerPoint 文件
+    prs.save(output_path)
+    LOG.info(f"演示文稿已保存到 '{output_path}'")
 
-    prs = Presentation(template_path)  # 加载 PowerPoint 模板
-    remove_all_slides(prs)  # 清除模板中的所有幻灯片
-    prs.core_properties.title = powerpoint_data.title  # 设置 PowerPoint 的核心标题
+
+def render_presentation(powerpoint_data, template_path: str, image_processor: ImageProcessor = None,
+                        images: Optional[Dict[str, bytes]] = None):
+    """
+    逐张渲染幻灯片并返回 Presentation。powerpoint_data 可以是 PowerPoint，
+    也可以是流式解析的 SlideStream：每解析完一张幻灯片就立即渲染，解析与渲染交替进行。
+    图片先经过 image_processor 缩小、压缩并去重后再插入。
+    传入 images（markdown 中的图片路径 -> 图片内容）时只使用内存中的图片，不读取磁盘。
+    """
+    image_processor = image_processor or default_image_processor
+    # 从模板缓存获取已清空幻灯片的新演示文稿，模板不存在时抛出 FileNotFoundError
+    prs = template_cache.new_presentation(template_path)
+    template_key = template_cache.digest(template_path)
+    cwd = os.getcwd()
+
+    # 幻灯片已全部解析时，先并行预处理所有图片
+    if isinstance(powerpoint_data.slides, list) and images is None:
+        image_processor.prepare(_image_requests(powerpoint_data.slides, prs, template_key, cwd))
 
     # 遍历所有幻灯片数据，生成对应的 PowerPoint 幻灯片
     for slide in powerpoint_data.slides:
-        # 确保布局索引不超出范围，超出则使用默认布局
-        if slide.layout_id >= len(prs.slide_layouts):
-            slide_layout = prs.slide_layouts[0]
-        else:
-            slide_layout = prs.slide_layouts[slide.layout_id]
-
-        new_slide = prs.slides.add_slide(slide_layout)  # 添加新的幻灯片
-
-        # 设置幻灯片标题
-        if new_slide.shapes.title:
-            new_slide.shapes.title.text = slide.content.title
-            LOG.debug(f"设置幻灯片标题: {slide.content.title}")
-
-        # 添加文本内容
-        for shape in new_slide.shapes:
-            # 只处理非标题的文本框
-            if shape.has_text_frame and not shape == new_slide.shapes.title:
-                text_frame = shape.text_frame
-                text_frame.clear()  # 清除原有内容
-                # 将要点内容作为项目符号列表添加到文本框中
-                for point in slide.content.bullet_points:
-                    p = text_frame.add_paragraph()
-                    p.text = point
-                    p.level = 0  # 项目符号的级别
-                    LOG.debug(f"添加列表项: {point}")
-                break
-
-        # 插入图片
-        if slide.content.image_path:
-            image_full_path = os.path.join(os.getcwd(), slide.content.image_path)  # 构建图片的绝对路径
-            if os.path.exists(image_full_path):
-                # 插入图片到占位符中
-                for shape in new_slide.placeholders:
-                    if shape.placeholder_format.type == 18:  # 18 表示图片占位符
-                        shape.insert_picture(image_full_path)
-                        LOG.debug(f"插入图片: {image_full_path}")
-                        break
-            else:
-                LOG.warning(f"图片路径 '{image_full_path}' 不存在，跳过此图片。")
+        render_slide(prs, slide, template_key, cwd, image_processor, images)
 
-    # 保存生成的 PowerPoint 文件
-    prs.save(output_path)
-    LOG.info(f"演示文稿已保存到 '{output_path}'")
+    # 流式解析时主标题在遍历过程中才确定，所以最后再设置 PowerPoint 的核心标题
+    prs.core_properties.title = powerpoint_data.title
+    LOG.debug(f"图片预处理统计: {image_processor.stats()}")
+    return prs
+
+
+def render_slide(prs, slide, template_key: str, cwd: str, image_processor: ImageProcessor,
+                 images: Optional[Dict[str, bytes]] = None):
+    """在 prs 末尾添加一张幻灯片并填充标题、要点和图片，返回新幻灯片。"""
+    # 确保布局索引不超出范围，超出则使用默认布局
+    layout_id = slide.layout_id if slide.layout_id < len(prs.slide_layouts) else 0
+    new_slide = prs.slides.add_slide(prs.slide_layouts[layout_id])  # 添加新的幻灯片
+    # 布局中标题、正文、图片占位符的 idx，每个布局只分析一次
+    roles = placeholder_index.roles(template_key, prs, layout_id)
+    placeholders = new_slide.placeholders
+
+    # 设置幻灯片标题
+    if roles.title is not None:
+        placeholders[roles.title].text = slide.content.title
+        LOG.debug(f"设置幻灯片标题: {slide.content.title}")
+
+    # 添加文本内容
+    if roles.body is not None:
+        text_frame = placeholders[roles.body].text_frame
+        text_frame.clear()  # 清除原有内容
+        # 将要点内容作为项目符号列表添加到文本框中
+        for point in slide.content.bullet_points:
+            p = text_frame.add_paragraph()
+            p.text = point
+            p.level = 0  # 项目符号的级别
+            LOG.debug(f"添加列表项: {point}")
+
+    # 插入图片
+    if slide.content.image_path and images is not None:
+        data = images.get(slide.content.image_path)
+        if data is None:
+            LOG.warning(f"图片 '{slide.content.image_path}' 未上传，跳过此图片。")
+        elif roles.picture is not None:
+            placeholders[roles.picture].insert_picture(image_processor.load_data(data, roles.picture_size))
+            LOG.debug(f"插入图片: {slide.content.image_path}")
+    elif slide.content.image_path:
+        # 同一个图片路径只解析和检查一次
+        image_full_path = resolve_image_path(slide.content.image_path, cwd)
+        if image_full_path and roles.picture is not None:
+            # 插入图片到占位符中
+            placeholders[roles.picture].insert_picture(image_processor.load(image_full_path, roles.picture_size))
+            LOG.debug(f"插入图片: {image_full_path}")
+    return new_slide
+
+
+def _image_requests(slides, prs, template_key: str, cwd: str):
+    for slide in slides:
+        if not slide.content.image_path:
+            continue
+        image_full_path = resolve_image_path(slide.content.image_path, cwd)
+        layout_id = slide.layout_id if slide.layout_id < len(prs.slide_layouts) else 0
+        roles = placeholder_index.roles(template_key, prs, layout_id)
+        if image_full_path and roles.picture is not None:
+            yield image_full_path, roles.picture_size
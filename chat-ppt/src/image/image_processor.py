@@ -0,0 +1,174 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+from utils.logger import LOG
+
+# 每英寸的 EMU 数
+EMU_PER_INCH = 914400
+
+
+def default_cache_dir() -> str:
+    return os.getenv('CHATPPT_IMAGE_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'chat-ppt', 'images'))
+
+
+class ImageProcessor:
+    """
+    图片预处理：按内容哈希去重，把图片缩小到占位符按 dpi 换算的像素尺寸并重新压缩。
+    处理结果保存在内存和磁盘缓存中，同一张图片在一次构建中只读取、处理一次，跨进程运行也可复用。
+    """
+
+    def __init__(self, dpi: int = 150, jpeg_quality: int = 85, cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None, max_memory_bytes: int = 256 * 1024 * 1024):
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_workers = max_workers
+        # 内存中保留的处理结果上限，常驻进程（服务、监听模式）中按写入顺序淘汰最早的结果
+        self.max_memory_bytes = max_memory_bytes
+        self._memory_bytes = 0
+        self._digests: Dict[tuple, str] = {}  # (路径, mtime, 大小) -> 内容哈希
+        self._memory: Dict[tuple, bytes] = {}  # (内容哈希, 目标像素) -> 处理后的图片
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.disk_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def target_pixels(self, size_emu: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        if not size_emu:
+            return None
+        width, height = size_emu
+        return (max(1, round(width / EMU_PER_INCH * self.dpi)),
+                max(1, round(height / EMU_PER_INCH * self.dpi)))
+
+    def prepare(self, requests: Iterable[Tuple[str, Optional[Tuple[int, int]]]]):
+        """在线程池中并行处理所有不同的 (图片路径, 占位符尺寸)。"""
+        distinct = list(dict.fromkeys(requests))
+        if not distinct:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for path, size_emu in distinct:
+                pool.submit(self._load_bytes, path, size_emu)
+
+    def load(self, image_path: str, size_emu: Optional[Tuple[int, int]] = None) -> BytesIO:
+        """返回处理后的图片，可以直接传给 insert_picture。"""
+        return BytesIO(self._load_bytes(image_path, size_emu))
+
+    def load_data(self, raw: bytes, size_emu: Optional[Tuple[int, int]] = None) -> BytesIO:
+        """处理内存中的图片（例如上传的文件），与磁盘上的图片共用缓存。"""
+        digest = hashlib.sha256(raw).hexdigest()
+        return BytesIO(self._processed(digest, raw, size_emu, "<memory>"))
+
+    def digest(self, image_path: str) -> str:
+        """图片内容的 sha256，按路径 + mtime/大小缓存，文件未变化时不重新读取。"""
+        return self._digest(image_path)[0]
+
+    def _digest(self, image_path: str) -> Tuple[str, Optional[bytes]]:
+        stat = os.stat(image_path)
+        file_key = (image_path, stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(file_key)
+        if digest is not None:
+            return digest, None
+        with open(image_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        self._digests[file_key] = digest
+        return digest, raw
+
+    def _load_bytes(self, image_path: str, size_emu: Optional[Tuple[int, int]]) -> bytes:
+        digest, raw = self._digest(image_path)
+        return self._processed(digest, raw, size_emu, image_path)
+
+    def _processed(self, digest: str, raw: Optional[bytes], size_emu: Optional[Tuple[int, int]],
+                   image_path: str) -> bytes:
+        target = self.target_pixels(size_emu)
+        key = (digest, target)
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        cache_file = self._cache_file(digest, target)
+        if os.path.exists(cache_file):
+            with open(cache_file, 'rb') as f:
+                data = f.read()
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            if raw is None:
+                with open(image_path, 'rb') as f:
+                    raw = f.read()
+            data = self._process(raw, target)
+            self._save(cache_file, data)
+            with self._lock:
+                self.processed += 1
+                self.bytes_in += len(raw)
+                self.bytes_out += len(data)
+            LOG.debug(f"图片已处理: {image_path} {len(raw)} -> {len(data)} 字节")
+        with self._lock:
+            if key not in self._memory:
+                self._memory[key] = data
+                self._memory_bytes += len(data)
+                while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                    evicted = self._memory.pop(next(iter(self._memory)))
+                    self._memory_bytes -= len(evicted)
+        return data
+
+    def _cache_file(self, digest: str, target: Optional[Tuple[int, int]]) -> str:
+        size = f"{target[0]}x{target[1]}" if target else "orig"
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}-{size}-q{self.jpeg_quality}.img")
+
+    def _process(self, raw: bytes, target: Optional[Tuple[int, int]]) -> bytes:
+        """
+        按占位符尺寸缩小（保持比例并覆盖整个占位符，insert_picture 会裁剪多余部分），
+        有透明通道的图片保存为 PNG，其余保存为 JPEG；结果不比原图小时使用原图。
+        """
+        try:
+            with Image.open(BytesIO(raw)) as image:
+                image = ImageOps.exif_transpose(image)
+                resized = False
+                if target:
+                    scale = max(target[0] / image.width, target[1] / image.height)
+                    if scale < 1:
+                        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                        image = image.resize(size, Image.LANCZOS)
+                        resized = True
+
+                buffer = BytesIO()
+                if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+                    image.save(buffer, format='PNG', optimize=True)
+                else:
+                    image.convert('RGB').save(buffer, format='JPEG', quality=self.jpeg_quality,
+                                              optimize=True, progressive=True)
+        except Exception as e:
+            LOG.warning(f"图片预处理失败，使用原图: {e}")
+            return raw
+        data = buffer.getvalue()
+        return data if resized or len(data) < len(raw) else raw
+
+    def _save(self, cache_file: str, data: bytes):
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, cache_file)
+        except OSError as e:
+            LOG.warning(f"写入图片缓存失败: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "processed": self.processed,
+            "disk_hits": self.disk_hits,
+            "distinct": len(self._memory),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+# 进程内共享的图片处理器
+image_processor = ImageProcessor()
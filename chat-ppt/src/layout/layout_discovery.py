@@ -0,0 +1,117 @@
+import json
+import os
+from dataclasses import asdict
+from typing import Dict, Optional, Tuple
+
+from layout.layout_manager import LayoutManager
+from layout.placeholder_index import LayoutRoles, analyse_layout, placeholder_index
+from template.template_manager import get_layout_mapping, template_cache
+from utils.logger import LOG
+
+# 分析逻辑变化时递增，旧的缓存自动失效
+LAYOUT_CACHE_VERSION = 1
+
+# 每种布局策略需要的占位符：(正文, 图片)
+REQUIRED_ROLES = {
+    'Title Only': (False, False),
+    'Title and Content': (True, False),
+    'Title and Picture': (False, True),
+    'Title, Content, and Picture': (True, True),
+}
+
+# 模板中没有完全匹配的布局时，依次尝试的替代布局（占位符更多，多出的占位符留空）
+FALLBACKS = {
+    'Title Only': ['Title and Content', 'Title and Picture', 'Title, Content, and Picture'],
+    'Title and Content': ['Title, Content, and Picture'],
+    'Title and Picture': ['Title, Content, and Picture'],
+    'Title, Content, and Picture': [],
+}
+
+
+def default_cache_dir() -> str:
+    return os.getenv('CHATPPT_LAYOUT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'chat-ppt', 'layouts'))
+
+
+def discover_layouts(prs) -> Tuple[Dict[str, int], Dict[int, LayoutRoles]]:
+    """
+    根据模板中每个布局的占位符类型，为每种布局策略找到合适的布局。
+    同名且占位符匹配的布局优先，其次是第一个占位符匹配的布局，都没有时使用 FALLBACKS 中的替代布局。
+    返回 (布局映射, 每个布局的占位符角色)。
+    """
+    roles = {idx: analyse_layout(layout) for idx, layout in enumerate(prs.slide_layouts)}
+    names = get_layout_mapping(prs)
+
+    exact: Dict[str, int] = {}
+    for strategy, (body, picture) in REQUIRED_ROLES.items():
+        candidates = [idx for idx, r in roles.items()
+                      if r.title is not None and (r.body is not None) == body and (r.picture is not None) == picture]
+        if not candidates:
+            continue
+        named = names.get(strategy)
+        exact[strategy] = named if named in candidates else candidates[0]
+
+    mapping = dict(exact)
+    for strategy in REQUIRED_ROLES:
+        if strategy in mapping:
+            continue
+        for alternative in FALLBACKS[strategy]:
+            if alternative in exact:
+                mapping[strategy] = exact[alternative]
+                LOG.warning(f"模板中没有 '{strategy}' 布局，使用 '{alternative}' 布局代替。")
+                break
+    return mapping, roles
+
+
+def _load_cache(cache_file: str) -> Optional[dict]:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get('version') == LAYOUT_CACHE_VERSION else None
+
+
+def _save_cache(cache_file: str, mapping: Dict[str, int], roles: Dict[int, LayoutRoles]):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': LAYOUT_CACHE_VERSION, 'mapping': mapping,
+                       'roles': {str(idx): asdict(r) for idx, r in roles.items()}}, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        LOG.warning(f"写入布局缓存失败: {e}")
+
+
+def load_layout_mapping(template_path: str, overrides: Optional[dict] = None,
+                        cache_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    获取模板的布局映射。分析结果按模板内容哈希缓存在磁盘上，同一模板只分析一次；
+    同时把每个布局的占位符角色预先放入占位符索引，渲染时不再重新分析。
+    overrides（config.json 中的 layout_mapping）可以覆盖自动识别的结果，超出模板布局范围时报错。
+    """
+    digest = template_cache.digest(template_path)
+    cache_file = os.path.join(cache_dir or default_cache_dir(), f"{digest}.json")
+    cached = _load_cache(cache_file)
+    if cached is not None:
+        mapping = cached['mapping']
+        roles = {int(idx): LayoutRoles(**{k: tuple(v) if isinstance(v, list) else v for k, v in r.items()})
+                 for idx, r in cached['roles'].items()}
+    else:
+        prs = template_cache.new_presentation(template_path)
+        mapping, roles = discover_layouts(prs)
+        _save_cache(cache_file, mapping, roles)
+        LOG.info(f"已识别模板布局: {mapping}")
+    placeholder_index.preload(digest, roles)
+
+    if overrides:
+        for name, layout_id in overrides.items():
+            if not 0 <= layout_id < len(roles):
+                raise ValueError(f"layout_mapping 中 '{name}' 的布局索引 {layout_id} 超出模板的布局数量 {len(roles)}。")
+        mapping = {**mapping, **overrides}
+    return mapping
+
+
+def build_layout_manager(config) -> LayoutManager:
+    """根据配置中的模板创建 LayoutManager，布局映射从模板自动识别。"""
+    return LayoutManager(load_layout_mapping(config.ppt_template, config.layout_mapping))
@@ -3,6 +3,13 @@ from structure.data_structures import SlideContent
 from typing import Tuple
 
 
+def lookup_layout(layout_mapping: dict, layout_name: str) -> int:
+    # 模板中没有对应的布局时直接报错，而不是退回到可能错位的默认布局
+    if layout_name not in layout_mapping:
+        raise KeyError(f"模板中没有可用于 '{layout_name}' 的布局，可在 config.json 的 layout_mapping 中指定。")
+    return layout_mapping[layout_name]
+
+
 class LayoutStrategy(ABC):
     @abstractmethod
     def get_layout(self, slide_content: SlideContent, layout_mapping: dict) -> Tuple[int, str]:
@@ -13,7 +20,7 @@ class LayoutStrategy(ABC):
 class TitleOnlyStrategy(LayoutStrategy):
     def get_layout(self, slide_content: SlideContent, layout_mapping: dict) -> Tuple[int, str]:
         layout_name = 'Title Only'  # 布局名称为 "Title Only"
-        layout_id = layout_mapping.get(layout_name, 1)  # 获取布局 ID，默认值为 1
+        layout_id = lookup_layout(layout_mapping, layout_name)  # 获取布局 ID
         return layout_id, layout_name
 
 
@@ -21,7 +28,7 @@ class TitleOnlyStrategy(LayoutStrategy):
 class TitleAndContentStrategy(LayoutStrategy):
     def get_layout(self, slide_content: SlideContent, layout_mapping: dict) -> Tuple[int, str]:
         layout_name = 'Title and Content'  # 布局名称为 "Title and Content"
-        layout_id = layout_mapping.get(layout_name, 2)  # 获取布局 ID，默认值为 2
+        layout_id = lookup_layout(layout_mapping, layout_name)  # 获取布局 ID
         return layout_id, layout_name
 
 
@@ -29,7 +36,7 @@ class TitleAndContentStrategy(LayoutStrategy):
 class TitleAndPictureStrategy(LayoutStrategy):
     def get_layout(self, slide_content: SlideContent, layout_mapping: dict) -> Tuple[int, str]:
         layout_name = 'Title and Picture'  # 布局名称为 "Title and Picture"
-        layout_id = layout_mapping.get(layout_name, 3)  # 获取布局 ID，默认值为 3
+        layout_id = lookup_layout(layout_mapping, layout_name)  # 获取布局 ID
         return layout_id, layout_name
 
 
@@ -37,27 +44,10 @@ class TitleAndPictureStrategy(LayoutStrategy):
 class TitleContentAndPictureStrategy(LayoutStrategy):
     def get_layout(self, slide_content: SlideContent, layout_mapping: dict) -> Tuple[int, str]:
         layout_name = 'Title, Content, and Picture'  # 布局名称为 "Title, Content, and Picture"
-        layout_id = layout_mapping.get(layout_name, 4)  # 获取布局 ID，默认值为 4
+        layout_id = lookup_layout(layout_mapping, layout_name)  # 获取布局 ID
         return layout_id, layout_name
 
 
-# 布局管理器类，负责根据 SlideContent 自动选择合适的布局策略。
-class LayoutManager:
-    """
-    布局管理器根据 SlideContent 的内容（如标题、要点和图片）自动选择合适的布局策略。
-    """
-
-    def __init__(self, layout_mapping: dict):
-        self.layout_mapping = layout_mapping  # 布局映射配置
-        # 定义四种不同的布局策略
-        self.strategies = {
-            'Title Only': TitleOnlyStrategy(),
-            'Title and Content': TitleAndContentStrategy(),
-            'Title and Picture': TitleAndPictureStrategy(),
-            'Title, Content, and Picture': TitleContentAndPictureStrategy()
-        }
-
-
 # 布局管理器类，负责根据 SlideContent 自动选择合适的布局策略。
 class LayoutManager:
     """
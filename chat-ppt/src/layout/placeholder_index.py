@@ -0,0 +1,74 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+# 标题类占位符
+TITLE_TYPES = (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE)
+# 可以放置要点的文本占位符（没有指定 type 的占位符默认为 BODY）
+BODY_TYPES = (PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT, PP_PLACEHOLDER.SUBTITLE)
+
+
+# 一个布局中各角色对应的占位符 idx，没有该角色时为 None
+@dataclass(frozen=True)
+class LayoutRoles:
+    title: Optional[int] = None
+    body: Optional[int] = None
+    picture: Optional[int] = None
+    # 图片占位符的尺寸 (宽, 高)，单位 EMU，用于预处理图片
+    picture_size: Optional[Tuple[int, int]] = None
+
+
+def analyse_layout(slide_layout) -> LayoutRoles:
+    """
+    分析布局中会被复制到新幻灯片的占位符，找出标题、正文和图片占位符的 idx。
+    多个同类占位符时取第一个，与逐个遍历 shapes 时的选择一致。
+    """
+    roles = {}
+    for placeholder in slide_layout.iter_cloneable_placeholders():
+        ph_type = placeholder.placeholder_format.type
+        if ph_type in TITLE_TYPES:
+            roles.setdefault('title', placeholder.placeholder_format.idx)
+        elif ph_type in BODY_TYPES:
+            roles.setdefault('body', placeholder.placeholder_format.idx)
+        elif ph_type == PP_PLACEHOLDER.PICTURE:
+            if 'picture' not in roles:
+                roles['picture'] = placeholder.placeholder_format.idx
+                if placeholder.width and placeholder.height:
+                    roles['picture_size'] = (placeholder.width, placeholder.height)
+    return LayoutRoles(**roles)
+
+
+class PlaceholderIndex:
+    """
+    按模板缓存每个布局的占位符角色，同一模板的每个布局只分析一次，
+    填充幻灯片时直接按 idx 取占位符，不再遍历 shapes 和 placeholders。
+    """
+
+    def __init__(self):
+        self._index: Dict[tuple, LayoutRoles] = {}
+        self._lock = threading.Lock()
+
+    def roles(self, template_key: str, prs, layout_id: int) -> LayoutRoles:
+        key = (template_key, layout_id)
+        roles = self._index.get(key)
+        if roles is None:
+            roles = analyse_layout(prs.slide_layouts[layout_id])
+            with self._lock:
+                self._index[key] = roles
+        return roles
+
+    def preload(self, template_key: str, roles: Dict[int, LayoutRoles]):
+        """放入已经分析好的布局角色（例如从磁盘缓存读取的结果）。"""
+        with self._lock:
+            for layout_id, layout_roles in roles.items():
+                self._index[(template_key, layout_id)] = layout_roles
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+
+
+# 进程内共享的占位符索引
+placeholder_index = PlaceholderIndex()
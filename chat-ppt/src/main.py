@@ -1,15 +1,15 @@
 import os
-from parser.input_parser import parse_input_text
-from generator.ppt_generator import generate_presentation
-from template.template_manager import load_template, get_layout_mapping, print_layouts
+from parser.input_parser import SlideStream, parse_input_text
+from generator.ppt_generator import generate_presentation, render_presentation
+from template.template_manager import load_template, print_layouts
 from config.config import Config
 from utils.logger import LOG
-from layout.layout_manager import LayoutManager
+from layout.layout_discovery import build_layout_manager
 import argparse
 from pathlib import Path
 
 
-def main(input_file: str):
+def main(input_file: str, stream: bool = False, incremental: bool = False):
     config = Config()  # 加载配置文件
 
     # 检查输入的 markdown 文件是否存在
@@ -17,17 +17,27 @@ def main(input_file: str):
         LOG.error(f"{input_file} 不存在。")  # 如果文件不存在，记录错误日志
         return
 
-        # 读取 markdown 文件的内容
-    with open(input_file, 'r', encoding='utf-8') as file:
-        input_text = file.read()
-
     # 加载 PowerPoint 模板，并打印模板中的可用布局
     prs = load_template(config.ppt_template)  # 加载模板文件
     LOG.info("可用的幻灯片布局:")  # 记录信息日志，打印可用布局
     # print_layouts(prs)  # 打印模板中的布局
 
-    # 初始化 LayoutManager，使用配置文件中的 layout_mapping
-    layout_manager = LayoutManager(config.layout_mapping)
+    # 初始化 LayoutManager，布局映射从模板自动识别，配置文件中的 layout_mapping 可覆盖
+    layout_manager = build_layout_manager(config)
+
+    if stream:
+        # 流式模式：逐行读取文件，解析出一张幻灯片就渲染一张，不保留全部幻灯片数据
+        with open(input_file, 'r', encoding='utf-8') as file:
+            slide_stream = SlideStream(file, layout_manager)
+            prs = render_presentation(slide_stream, config.ppt_template)
+        output_pptx = f"outputs/{slide_stream.title}.pptx"
+        prs.save(output_pptx)
+        LOG.info(f"共 {slide_stream.count} 张幻灯片，演示文稿已保存到 '{output_pptx}'")
+        return
+
+    # 读取 markdown 文件的内容
+    with open(input_file, 'r', encoding='utf-8') as file:
+        input_text = file.read()
 
     # 调用 parse_input_text 函数，解析输入文本，生成 PowerPoint 数据结构
     powerpoint_data, presentation_title = parse_input_text(input_text, layout_manager)
@@ -37,6 +47,12 @@ def main(input_file: str):
     # 定义输出 PowerPoint 文件的路径
     output_pptx = f"outputs/{presentation_title}.pptx"
 
+    if incremental:
+        # 增量模式：只重新渲染内容有变化的幻灯片
+        from generator.incremental_builder import incremental_generate
+        incremental_generate(powerpoint_data, config.ppt_template, output_pptx)
+        return
+
     # 调用 generate_presentation 函数生成 PowerPoint 演示文稿
     generate_presentation(powerpoint_data, config.ppt_template, output_pptx)
 
@@ -49,11 +65,36 @@ if __name__ == "__main__":
         default='inputs/test_input.md',  # 默认值为 'inputs/test_input.md'
         help='输入 markdown 文件的路径（默认: inputs/test_input.md）'
     )
+    parser.add_argument('--stream', action='store_true', help='流式解析与渲染，适合幻灯片数量很多的大文件')
+    parser.add_argument('--incremental', action='store_true', help='增量生成：只重新渲染有变化的幻灯片')
+    parser.add_argument('--watch', action='store_true',
+                        help='常驻监听输入文件、图片、配置与模板的变化，保存后自动增量重新生成')
+    parser.add_argument('--serve', action='store_true', help='以 HTTP 服务方式运行，在内存中渲染并返回 pptx')
+    parser.add_argument('--host', default='127.0.0.1', help='服务监听地址（默认: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8000, help='服务监听端口（默认: 8000）')
+    parser.add_argument('--batch', default=None,
+                        help='批量模式：markdown 文件所在目录或 glob 模式（如 "decks/**/*.md"）')
+    parser.add_argument('--workers', type=int, default=None, help='批量模式与服务模式的进程数（默认: CPU 核数）')
+    parser.add_argument('--output-dir', default='outputs', help='批量模式的输出目录（默认: outputs）')
 
     # 解析命令行参数
     args = parser.parse_args()
 
+    if args.serve:
+        from server.render_server import serve
+        serve(args.host, args.port, workers=args.workers)
+        raise SystemExit(0)
+
+    if args.batch:
+        from batch.batch_runner import run_batch
+        run_batch(args.batch, output_dir=args.output_dir, workers=args.workers)
+        raise SystemExit(0)
+
     app_dir = Path(__file__).parent.parent
     config_json_file = os.path.join(app_dir, 'resources', args.input_file)
     # print(config_json_file)
-    main(config_json_file)
+    if args.watch:
+        from watch.deck_watcher import DeckWatcher
+        DeckWatcher(config_json_file).run()
+        raise SystemExit(0)
+    main(config_json_file, stream=args.stream, incremental=args.incremental)
@@ -1,25 +1,46 @@
 import re
 from dataclasses import field, dataclass
-from typing import Optional, Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 from builder.slide_builder import SlideBuilder
 from structure.data_structures import Slide, SlideContent, PowerPoint
 from layout.layout_manager import LayoutManager
 
 
-# 解析输入文本，生成 PowerPoint 数据结构
-def parse_input_text(input_text: str, layout_manager: LayoutManager) -> Tuple:
+# 正则表达式，用于匹配幻灯片标题、要点和图片
+slide_title_pattern = re.compile(r'^##\s+(.*)')
+bullet_pattern = re.compile(r'^-\s+(.*)')
+image_pattern = re.compile(r'!\[.*?\]\((.*?)\)')
+
+
+class SlideStream:
     """
-    解析输入的文本并转换为 PowerPoint 数据结构。自动为每张幻灯片分配适当的布局。
+    流式解析输入：逐行读取，每完成一张幻灯片就产出一个 Slide，不保留全部幻灯片。
+    可以像 PowerPoint 一样传给 generate_presentation，title 在读到主标题后才有值。
     """
-    lines = input_text.split('\n')  # 按行拆分文本
-    presentation_title = ""  # PowerPoint 的主标题
-    slides = []  # 存储所有幻灯片
-    slide_builder: Optional[SlideBuilder] = None  # 当前幻灯片的构建器
 
-    # 正则表达式，用于匹配幻灯片标题、要点和图片
-    slide_title_pattern = re.compile(r'^##\s+(.*)')
-    bullet_pattern = re.compile(r'^-\s+(.*)')
-    image_pattern = re.compile(r'!\[.*?\]\((.*?)\)')
+    def __init__(self, lines: Iterable[str], layout_manager: LayoutManager):
+        self.lines = lines
+        self.layout_manager = layout_manager
+        self.title = ""  # PowerPoint 的主标题
+        self.count = 0  # 已产出的幻灯片数量
+
+    @property
+    def slides(self) -> Iterator[Slide]:
+        return iter(self)
+
+    def __iter__(self) -> Iterator[Slide]:
+        for slide in iter_slides(self.lines, self.layout_manager, self):
+            self.count += 1
+            yield slide
+
+
+def iter_slides(lines: Iterable[str], layout_manager: LayoutManager,
+                stream: Optional[SlideStream] = None) -> Iterator[Slide]:
+    """
+    逐行解析输入（可以直接传入文件对象），每完成一张幻灯片立即产出。自动为每张幻灯片分配适当的布局。
+    传入 stream 时把解析到的主标题记录到 stream.title。
+    """
+    slide_builder: Optional[SlideBuilder] = None  # 当前幻灯片的构建器
 
     for line in lines:
         line = line.strip()  # 去除空格
@@ -27,11 +48,13 @@ def parse_input_text(input_text: str, layout_manager: LayoutManager) -> Tuple:
         # 主标题 (用作 PowerPoint 的标题和文件名)
         if line.startswith('# ') and not line.startswith('##'):
             presentation_title = line[2:].strip()
+            if stream is not None:
+                stream.title = presentation_title
 
             # 创建第一张幻灯片，使用 "Title Only" 布局
             first_slide_builder = SlideBuilder(layout_manager)
             first_slide_builder.set_title(presentation_title)
-            slides.append(first_slide_builder.finalize())
+            yield first_slide_builder.finalize()
 
         # 幻灯片标题
         elif line.startswith('## '):
@@ -39,9 +62,9 @@ def parse_input_text(input_text: str, layout_manager: LayoutManager) -> Tuple:
             if match:
                 title = match.group(1).strip()
 
-                # 如果有当前幻灯片，生成并添加到幻灯片列表中
+                # 如果有当前幻灯片，生成并产出
                 if slide_builder:
-                    slides.append(slide_builder.finalize())
+                    yield slide_builder.finalize()
 
                 # 创建新的 SlideBuilder
                 slide_builder = SlideBuilder(layout_manager)
@@ -61,9 +84,18 @@ def parse_input_text(input_text: str, layout_manager: LayoutManager) -> Tuple:
                 image_path = match.group(1).strip()
                 slide_builder.set_image(image_path)
 
-    # 为最后一张幻灯片分配布局并添加到列表中
+    # 为最后一张幻灯片分配布局并产出
     if slide_builder:
-        slides.append(slide_builder.finalize())
+        yield slide_builder.finalize()
+
+
+# 解析输入文本，生成 PowerPoint 数据结构
+def parse_input_text(input_text: str, layout_manager: LayoutManager) -> Tuple:
+    """
+    解析输入的文本并转换为 PowerPoint 数据结构。自动为每张幻灯片分配适当的布局。
+    """
+    stream = SlideStream(input_text.split('\n'), layout_manager)  # 按行拆分文本
+    slides = list(stream)  # 存储所有幻灯片
 
     # 返回 PowerPoint 数据结构以及演示文稿标题
-    return PowerPoint(title=presentation_title, slides=slides), presentation_title
+    return PowerPoint(title=stream.title, slides=slides), stream.title
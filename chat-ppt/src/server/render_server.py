@@ -0,0 +1,188 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from config.config import Config
+from generator.ppt_generator import render_presentation
+from layout.layout_discovery import build_layout_manager
+from layout.layout_manager import LayoutManager
+from parser.input_parser import parse_input_text
+from template.template_manager import template_cache
+from utils.logger import LOG
+
+# 渲染耗时直方图的分桶（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 单个上传请求的大小上限（字节）
+MAX_UPLOAD_BYTES = int(os.getenv('CHATPPT_MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 每个工作进程内只初始化一次的配置与布局管理器
+_worker_config: Optional[Config] = None
+_worker_layout_manager: Optional[LayoutManager] = None
+
+
+def init_worker(config_file: str = 'config.json'):
+    """工作进程初始化：加载配置、布局管理器，并预热模板缓存。"""
+    global _worker_config, _worker_layout_manager
+    _worker_config = Config(config_file)
+    _worker_layout_manager = build_layout_manager(_worker_config)
+    template_cache.digest(_worker_config.ppt_template)
+
+
+def render_markdown(markdown: str, images: Dict[str, bytes]) -> Tuple[str, bytes, float]:
+    """在工作进程中渲染 markdown，返回 (标题, pptx 内容, 渲染耗时)，全程不写临时文件。"""
+    started = time.perf_counter()
+    powerpoint_data, presentation_title = parse_input_text(markdown, _worker_layout_manager)
+    prs = render_presentation(powerpoint_data, _worker_config.ppt_template, images=images)
+    buffer = BytesIO()
+    prs.save(buffer)
+    return presentation_title, buffer.getvalue(), time.perf_counter() - started
+
+
+class RenderService:
+    """
+    渲染服务：在预热过模板缓存的进程池中渲染，记录排队深度与渲染耗时。
+    """
+
+    def __init__(self, workers: Optional[int] = None, config_file: str = 'config.json'):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(config_file,))
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_sum = 0.0
+        self.render_sum = 0.0
+        self.buckets = {bucket: 0 for bucket in LATENCY_BUCKETS}
+
+    def warm_up(self):
+        # 提前启动所有工作进程，第一次请求不必等待进程启动与模板加载
+        for _ in range(self.workers):
+            self.pool.submit(int)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def render(self, markdown: str, images: Dict[str, bytes]) -> Tuple[str, bytes]:
+        started = time.perf_counter()
+        self.in_flight += 1
+        try:
+            title, data, render_seconds = await asyncio.get_running_loop().run_in_executor(
+                self.pool, render_markdown, markdown, images)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        latency = time.perf_counter() - started
+        self.completed += 1
+        self.latency_sum += latency
+        self.render_sum += render_seconds
+        for bucket in LATENCY_BUCKETS:
+            if latency <= bucket:
+                self.buckets[bucket] += 1
+        return title, data
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_latency_seconds": round(self.latency_sum / self.completed, 4) if self.completed else 0.0,
+        }
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# TYPE chatppt_render_in_flight gauge",
+            f"chatppt_render_in_flight {self.in_flight}",
+            "# TYPE chatppt_render_queue_depth gauge",
+            f"chatppt_render_queue_depth {self.queue_depth}",
+            "# TYPE chatppt_render_failures_total counter",
+            f"chatppt_render_failures_total {self.failed}",
+            "# TYPE chatppt_render_worker_seconds_total counter",
+            f"chatppt_render_worker_seconds_total {self.render_sum:g}",
+            # 请求耗时包含排队时间
+            "# TYPE chatppt_render_latency_seconds histogram",
+        ]
+        for bucket in LATENCY_BUCKETS:
+            lines.append(f'chatppt_render_latency_seconds_bucket{{le="{bucket:g}"}} {self.buckets[bucket]}')
+        lines.append(f'chatppt_render_latency_seconds_bucket{{le="+Inf"}} {self.completed}')
+        lines.append(f"chatppt_render_latency_seconds_sum {self.latency_sum:g}")
+        lines.append(f"chatppt_render_latency_seconds_count {self.completed}")
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_chunks(data: bytes):
+    view = memoryview(data)
+    for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield bytes(view[offset:offset + STREAM_CHUNK_SIZE])
+
+
+def create_app(workers: Optional[int] = None) -> FastAPI:
+    api = FastAPI(title="chat-ppt")
+    service: Dict[str, RenderService] = {}
+
+    @api.on_event("startup")
+    async def startup():
+        service["instance"] = RenderService(workers=workers)
+        service["instance"].warm_up()
+
+    @api.on_event("shutdown")
+    async def shutdown():
+        service["instance"].shutdown()
+
+    @api.post("/render")
+    async def render(markdown: str = Form(...), images: List[UploadFile] = File(default=[])):
+        """
+        markdown 中的图片按路径匹配上传的文件名，例如 ![图表](images/chart.png) 对应上传的 images/chart.png。
+        """
+        uploaded: Dict[str, bytes] = {}
+        total = len(markdown.encode('utf-8'))
+        for upload in images:
+            data = await upload.read()
+            total += len(data)
+            if total > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="上传内容过大")
+            uploaded[upload.filename] = data
+
+        try:
+            title, data = await service["instance"].render(markdown, uploaded)
+        except Exception as e:
+            LOG.error(f"渲染失败: {type(e).__name__}: {e}")
+            raise HTTPException(status_code=500, detail=f"渲染失败: {e}")
+        filename = quote(f"{title or 'presentation'}.pptx")
+        return StreamingResponse(
+            _iter_chunks(data),
+            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            headers={"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"},
+        )
+
+    @api.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(service["instance"].prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    @api.get("/health")
+    async def health():
+        return {"status": "ok", **service["instance"].stats()}
+
+    return api
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: Optional[int] = None):
+    import uvicorn
+
+    uvicorn.run(create_app(workers), host=host, port=port)
@@ -1,6 +1,11 @@
 from pptx import Presentation
 
+import hashlib
 import os
+import threading
+from io import BytesIO
+from utils.util import remove_all_slides
+from utils.logger import LOG
 
 
 def get_app_dir() -> str:
@@ -9,11 +14,81 @@ def get_app_dir() -> str:
     return root_dir
 
 
+def resolve_template_path(template_path: str) -> str:
+    """
+    解析模板文件的绝对路径：绝对路径或相对当前目录存在时直接使用，否则视为 resources 下的相对路径。
+    """
+    if os.path.isabs(template_path) or os.path.exists(template_path):
+        return os.path.abspath(template_path)
+    return os.path.join(get_app_dir(), 'resources', template_path)
+
+
+class _TemplateEntry:
+    def __init__(self, signature: tuple, data: bytes, digest: str):
+        self.signature = signature  # (mtime_ns, size)，用于判断模板文件是否被修改
+        self.data = data  # 已清空幻灯片的模板字节
+        self.digest = digest  # 模板文件内容的 sha256
+
+
+class TemplateCache:
+    """
+    模板缓存：每个模板文件只从磁盘读取、清空幻灯片一次，保存为内存中的字节，
+    之后每次构建都从这份字节创建新的 Presentation，不再重复读盘和清理幻灯片。
+    以路径 + mtime/大小判断模板是否变化，变化后自动重新加载。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, template_path: str) -> _TemplateEntry:
+        path = resolve_template_path(template_path)
+        if not os.path.exists(path):
+            LOG.error(f"模板文件 '{path}' 不存在。")
+            raise FileNotFoundError(f"模板文件 '{path}' 不存在。")
+
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            with open(path, 'rb') as f:
+                raw = f.read()
+            prs = Presentation(BytesIO(raw))
+            remove_all_slides(prs)  # 清除模板中的所有幻灯片，只需要做一次
+            buffer = BytesIO()
+            prs.save(buffer)
+            entry = _TemplateEntry(signature, buffer.getvalue(), hashlib.sha256(raw).hexdigest())
+            self._entries[path] = entry
+            LOG.debug(f"模板已加载并缓存: {path}")
+            return entry
+
+    def new_presentation(self, template_path: str) -> Presentation:
+        """返回一份基于模板的全新 Presentation（不含任何幻灯片），可以随意修改。"""
+        return Presentation(BytesIO(self._entry(template_path).data))
+
+    def digest(self, template_path: str) -> str:
+        """模板文件内容的 sha256。"""
+        return self._entry(template_path).digest
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 进程内共享的模板缓存
+template_cache = TemplateCache()
+
+
 # 加载一个ppt模板
 def load_template(template_path: str) -> Presentation:
-    template_local_path = os.path.join(get_app_dir(), 'resources',template_path)
-    prs = Presentation(template_local_path)
-    return prs
+    return template_cache.new_presentation(template_path)
 
 
 def get_layout_mapping(prs: Presentation) -> dict:
@@ -1,4 +1,9 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
 from pptx import Presentation
+from utils.logger import LOG
 
 
 def remove_all_slides(prs: Presentation):
@@ -6,4 +11,18 @@ def remove_all_slides(prs: Presentation):
     slides = list(xml_slides)
     for slide in slides:
         xml_slides.remove(slide)
+        # 同时删除幻灯片的关系，否则被移除的幻灯片仍会随文件一起保存
+        prs.part.drop_rel(slide.rId)
     print("所有默认幻灯片已被移除。")
+
+
+@lru_cache(maxsize=4096)
+def resolve_image_path(image_path: str, base_dir: str) -> Optional[str]:
+    """
+    解析图片的绝对路径并检查是否存在，同一个路径只检查一次；不存在时返回 None。
+    """
+    image_full_path = os.path.join(base_dir, image_path)  # 构建图片的绝对路径
+    if os.path.exists(image_full_path):
+        return image_full_path
+    LOG.warning(f"图片路径 '{image_full_path}' 不存在，跳过此图片。")
+    return None
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from config.config import Config
+from generator.incremental_builder import incremental_generate
+from layout.layout_discovery import build_layout_manager
+from layout.layout_manager import LayoutManager
+from parser.input_parser import parse_input_text
+from template.template_manager import resolve_template_path, template_cache
+from utils.util import resolve_image_path
+from utils.logger import LOG
+
+try:
+    # 安装了 watchdog 时使用 inotify 等系统通知，否则定时轮询文件的 mtime
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - 取决于运行环境
+    Observer = None
+
+
+class DeckWatcher:
+    """
+    常驻进程：配置、布局管理器、模板缓存和占位符索引保持在内存中，
+    监听输入的 markdown、引用的图片、config.json 与模板文件，变化后去抖动并在后台增量重新生成。
+    """
+
+    def __init__(self, input_file: str, config_file: str = 'config.json', output_dir: str = 'outputs',
+                 debounce: float = 0.15, poll_interval: float = 0.25):
+        self.input_file = os.path.abspath(input_file)
+        self.config_file = config_file
+        self.output_dir = output_dir
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.config: Optional[Config] = None
+        self.layout_manager: Optional[LayoutManager] = None
+        self._config_signature = None
+        self._images: Set[str] = set()
+        self._dirty = threading.Event()  # 需要重新生成
+        self._changed = threading.Event()  # watchdog 通知有文件变化
+        self._observer = None
+        self._watched_dirs: Set[str] = set()
+
+    def _load_config(self):
+        self.config = Config(self.config_file)
+        self.layout_manager = build_layout_manager(self.config)
+        # 预热模板缓存
+        template_cache.digest(self.config.ppt_template)
+        LOG.info(f"已加载配置: {self.config.config_file}")
+
+    def watched_files(self) -> Set[str]:
+        files = {self.input_file, self.config.config_file, resolve_template_path(self.config.ppt_template)}
+        return files | self._images
+
+    @staticmethod
+    def _snapshot(files: Set[str]) -> Dict[str, Optional[tuple]]:
+        snapshot = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def rebuild(self):
+        started = time.perf_counter()
+        # 配置或模板变化时重新加载配置，并重新识别模板布局
+        config_signature = self._snapshot({self.config.config_file, resolve_template_path(self.config.ppt_template)})
+        if config_signature != self._config_signature:
+            self._config_signature = config_signature
+            self._load_config()
+        # 图片可能被新增或删除，每次重新生成前重新检查
+        resolve_image_path.cache_clear()
+
+        with open(self.input_file, 'r', encoding='utf-8') as file:
+            input_text = file.read()
+        powerpoint_data, presentation_title = parse_input_text(input_text, self.layout_manager)
+        cwd = os.getcwd()
+        self._images = {path for path in (resolve_image_path(slide.content.image_path, cwd)
+                                          for slide in powerpoint_data.slides if slide.content.image_path) if path}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_pptx = os.path.join(self.output_dir, f"{presentation_title}.pptx")
+        report = incremental_generate(powerpoint_data, self.config.ppt_template, output_pptx)
+        LOG.info(f"已重新生成 '{output_pptx}'，用时 {(time.perf_counter() - started) * 1000:.0f} ms: {report}")
+
+    def _build_loop(self):
+        # 后台生成线程：生成期间的多次变化合并为一次重新生成
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            try:
+                self.rebuild()
+            except Exception as e:
+                LOG.error(f"重新生成失败: {type(e).__name__}: {e}")
+
+    def _watch_dirs(self, files: Set[str]):
+        if Observer is None:
+            return
+        dirs = {os.path.dirname(path) for path in files if os.path.isdir(os.path.dirname(path))}
+        if dirs == self._watched_dirs:
+            return
+        if self._observer is not None:
+            self._observer.stop()
+        changed = self._changed
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                changed.set()
+
+        self._observer = Observer()
+        for directory in dirs:
+            self._observer.schedule(Handler(), directory, recursive=False)
+        self._observer.start()
+        self._watched_dirs = dirs
+
+    def run(self):
+        self._load_config()
+        self._config_signature = self._snapshot({self.config.config_file,
+                                                  resolve_template_path(self.config.ppt_template)})
+        self.rebuild()
+        threading.Thread(target=self._build_loop, name="deck-rebuild", daemon=True).start()
+
+        last = self._snapshot(self.watched_files())
+        LOG.info(f"正在监听 {len(last)} 个文件的变化，按 Ctrl+C 退出")
+        try:
+            while True:
+                # 引用的图片随 markdown 变化，每轮重新计算监听的文件
+                files = self.watched_files()
+                self._watch_dirs(files)
+                # 有系统通知时等待通知，同时保留较长间隔的轮询作为兜底
+                self._changed.wait(self.poll_interval if self._observer is None else 5)
+                self._changed.clear()
+                current = self._snapshot(files)
+                # 新加入监听的文件不算变化（引用它的 markdown 已经触发了重新生成）
+                if all(current[path] == last.get(path, current[path]) for path in files):
+                    last = current
+                    continue
+                # 去抖动：等到文件在 debounce 时间内不再变化（例如编辑器分多次写入）
+                while True:
+                    time.sleep(self.debounce)
+                    newer = self._snapshot(files)
+                    if newer == current:
+                        break
+                    current = newer
+                last = current
+                self._dirty.set()
+        except KeyboardInterrupt:
+            LOG.info("已停止监听。")
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
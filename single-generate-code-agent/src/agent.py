@@ -1,16 +1,240 @@
-from typing import Dict, Optional, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import ChatMessage, BaseMessage, AIMessage, SystemMessage, HumanMessage
+import time
+
+# 模块开始导入的时间，用于 --profile-startup 统计启动耗时
+_IMPORT_STARTED = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# .env 中的 CODEGEN_* 配置在各模块导入时读取（模型名、缓存、截止时间、对冲等），必须在导入它们之前加载
+load_dotenv()
+
+from typing import Dict, Optional, Any, Annotated, Callable, Iterator
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import BaseOutputParser, JsonOutputParser
 from langgraph.graph import StateGraph, START, END
-from dotenv import load_dotenv
+from langgraph.types import Send
+from contextlib import closing
+from functools import partial
 from pathlib import Path
+from json_stream import RecoveringFilesParser, iter_json_object_pairs
+from llm_cache import LLMCache, make_cache_key
+from llm_client import (DeadlineExceeded, HedgedInvoker, LLM_REQUEST_TIMEOUT, CALL_DEADLINES,
+                        make_http_clients)
+from scaffold_templates import render_templates
+from project_writer import ProjectWriter
+from metrics import METRICS, MetricsRecorder, current_run, record
+from fast_parse import FastPathStats, try_fast_path
+import argparse
+import os
 import pprint
+import queue
+import random
+import threading
+from uuid import uuid4
 
-load_dotenv()
+# 模型配置；客户端在第一次调用 LLM 时才创建，见 get_llm()
+LLM_MODEL = os.getenv("CODEGEN_LLM_MODEL", "qwen-max")
+LLM_TEMPERATURE = float(os.environ["CODEGEN_LLM_TEMPERATURE"]) if os.getenv("CODEGEN_LLM_TEMPERATURE") else None
+
+# 启动耗时目标（毫秒），--profile-startup 时用于判断是否达标
+STARTUP_TARGET_MS = float(os.getenv("CODEGEN_STARTUP_TARGET_MS", "500"))
+
+_llm = None
+_llm_lock = threading.Lock()
+
+# 执行 LLM 调用：节点截止时间与对冲请求（CODEGEN_LLM_HEDGE=1 开启）
+llm_invoker = HedgedInvoker()
+
+# LLM 结果缓存，CODEGEN_CACHE_BYPASS=1 时跳过缓存直接请求模型
+llm_cache = LLMCache(bypass=os.getenv("CODEGEN_CACHE_BYPASS") == "1")
+
+# generate_files 的两种模式：一次性生成全部文件 / 按文件拆分并发生成
+FILE_MODE_BULK = "bulk"
+FILE_MODE_PER_FILE = "per_file"
 
-llm = ChatOpenAI(model='qwen-max')
+# 文件来源：本地模板渲染 / LLM 生成
+SOURCE_TEMPLATE = "template"
+SOURCE_LLM = "llm"
+
+# 按文件拆分时的默认并发上限，通过 config 的 max_concurrency 传给 LangGraph
+MAX_CONCURRENCY = 8
+
+# LLM 调用失败（请求异常或输出无法解析）时的最大尝试次数与指数退避的基础等待时间（秒）
+LLM_MAX_ATTEMPTS = int(os.getenv("CODEGEN_LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("CODEGEN_LLM_RETRY_BASE_DELAY", "1.0"))
+
+# 规则快速解析的最低置信度，低于该值或必填字段缺失时交给 LLM 解析
+FAST_PARSE_MIN_CONFIDENCE = float(os.getenv("CODEGEN_FAST_PARSE_MIN_CONFIDENCE", "0.8"))
+fast_path_stats = FastPathStats()
+
+# 默认的检查点文件
+DEFAULT_CHECKPOINT_PATH = "checkpoints.sqlite"
+
+
+class GenerationError(RuntimeError):
+    """严格模式下 LLM 节点重试耗尽后抛出，交给检查点在下次运行时从该节点恢复。"""
+
+
+def merge_files(left: Optional[Dict[str, str]], right: Optional[Dict[str, str]]) -> Dict[str, str]:
+    # 并发生成的文件结果合并到同一个 files 中
+    return {**(left or {}), **(right or {})}
+
+
+def merge_list(left: Optional[list], right: Optional[list]) -> list:
+    return (left or []) + (right or [])
+
+
+def get_llm():
+    """
+    延迟创建 LLM 客户端：langchain_openai 的导入与客户端构造都放到第一次调用时（.env 在模块顶部已加载），
+    命中缓存或只做预览的短任务不必付出这部分启动开销。
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+
+                # stream_usage: 流式调用时同样返回 token 用量，供指标统计
+                # 所有节点共享同一个连接池，单个请求超时由 LLM_REQUEST_TIMEOUT 控制
+                http_client, http_async_client = make_http_clients()
+                kwargs = {"model": LLM_MODEL, "stream_usage": True, "timeout": LLM_REQUEST_TIMEOUT,
+                          "http_client": http_client, "http_async_client": http_async_client}
+                if LLM_TEMPERATURE is not None:
+                    kwargs["temperature"] = LLM_TEMPERATURE
+                _llm = ChatOpenAI(**kwargs)
+    return _llm
+
+
+def set_llm(llm):
+    """替换 LLM 客户端，例如在基准测试中注入本地的假模型。"""
+    global _llm
+    with _llm_lock:
+        _llm = llm
+
+
+def with_retry(fn, what: str):
+    # 指数退避重试，带少量随机抖动，避免并发任务同时重试
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        try:
+            return fn()
+        except DeadlineExceeded:
+            # 已经超过单次调用的截止时间或线程池已满，重试只会让整个流程更慢
+            raise
+        except Exception as e:
+            if attempt == LLM_MAX_ATTEMPTS:
+                raise
+            delay = LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random() * 0.25)
+            print(f"[重试] {what} 第 {attempt} 次失败，{delay:.1f}s 后重试:", e)
+            record(retries=1)
+            time.sleep(delay)
+
+
+def fallback_or_raise(state: Dict[str, Any], node: str, error: Exception):
+    # 严格模式（使用检查点时）不使用兜底结果，直接失败，以便从失败的节点恢复
+    if state.get("strict"):
+        raise GenerationError(f"{node} 失败: {error}") from error
+
+
+def _record_usage(message, started: float):
+    run = current_run()
+    if run is None:
+        return
+    run.first_token(time.perf_counter() - started)
+    usage = getattr(message, "usage_metadata", None) or {}
+    run.add(llm_calls=1, prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0))
+
+
+def _invoke_llm(fn, hedge: bool = True):
+    """按当前节点配置的单次调用截止时间执行 LLM 调用，慢请求按需对冲。"""
+    run = current_run()
+    node = run.node if run is not None else "default"
+
+    def on_hedge(won: bool):
+        record(hedges=1, hedge_wins=1 if won else 0)
+
+    return llm_invoker.invoke(fn, node, CALL_DEADLINES.get(node), on_hedge=on_hedge, hedge=hedge)
+
+
+def _cache_key(prompt: ChatPromptTemplate, inputs: dict) -> tuple[str, list[BaseMessage]]:
+    messages = prompt.invoke(inputs).to_messages()
+    key = make_cache_key(LLM_MODEL, [(m.type, m.content) for m in messages], LLM_TEMPERATURE)
+    return key, messages
+
+
+def call_llm(prompt: ChatPromptTemplate, inputs: dict, parser: BaseOutputParser, fresh: bool = False,
+             cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    调用 LLM 并解析结果，相同模型、提示词和温度的请求直接命中本地缓存。
+    只有完整解析成功的输出才写入缓存，避免把损坏的结果缓存下来反复使用：
+    容错解析只恢复出部分文件（unrecoverable 非空）时同样不缓存。
+    fresh=True 时不读取缓存（重试时避免拿回同一个错误结果）；cacheable 可进一步判断结果是否值得缓存。
+    """
+    key, messages = _cache_key(prompt, inputs)
+    cached = None if fresh else llm_cache.get(key)
+    if cached is not None:
+        print("[缓存] 命中 LLM 缓存")
+        record(cache_hits=1)
+        return parser.parse(cached)
+    record(cache_misses=0 if llm_cache.bypass else 1)
+
+    def invoke_and_parse():
+        # 输出无法解析时同样重试
+        started = time.perf_counter()
+        message = _invoke_llm(lambda: get_llm().invoke(messages))
+        _record_usage(message, started)
+        text = message.content
+        return text, parser.parse(text)
+
+    text, result = with_retry(invoke_and_parse, "LLM 调用")
+    if not getattr(result, "unrecoverable", None) and (cacheable is None or cacheable(result)):
+        llm_cache.set(key, text)
+    return result
+
+
+def stream_llm(prompt: ChatPromptTemplate, inputs: dict) -> Iterator[str]:
+    """
+    流式调用 LLM；命中缓存（由非流式调用写入）时一次性产出缓存内容。
+    流式输出不写入缓存，分片产出后即丢弃，内存占用不随输出长度增长。
+    """
+    key, messages = _cache_key(prompt, inputs)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        print("[缓存] 命中 LLM 缓存")
+        record(cache_hits=1)
+        yield cached
+        return
+    record(cache_misses=0 if llm_cache.bypass else 1)
+
+    def open_stream():
+        # 只在收到第一个 token 之前重试，已经产出的内容无法撤回
+        stream = iter(get_llm().stream(messages))
+        return stream, next(stream, None)
+
+    started = time.perf_counter()
+    # 截止时间只约束首个 token；流式调用不对冲，避免重复生成整份输出
+    stream, first = with_retry(lambda: _invoke_llm(open_stream, hedge=False), "LLM 流式调用")
+    if first is None:
+        return
+    run = current_run()
+    if run is not None:
+        run.first_token(time.perf_counter() - started)
+    usage = {}
+    try:
+        yield first.content
+        for chunk in stream:
+            # token 用量通常只在最后一个分片中返回
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk.content
+    finally:
+        # 调用方提前停止读取或出错时也关闭底层流并记录本次调用
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        record(llm_calls=1, prompt_tokens=usage.get("input_tokens", 0),
+               completion_tokens=usage.get("output_tokens", 0))
 
 
 class AgentState(Dict):
@@ -20,8 +244,36 @@ class AgentState(Dict):
     params: Optional[Dict[str, Any]]
     # 生成的目录结构
     structure: Optional[list[dict[str, Any]]]
-    # 生成的文件内容
-    files: Optional[Dict[str, str]]
+    # 生成的文件内容（按文件并发生成时由多个任务合并）
+    files: Annotated[Optional[Dict[str, str]], merge_files]
+    # 每个文件的来源（SOURCE_TEMPLATE / SOURCE_LLM）
+    file_sources: Annotated[Optional[Dict[str, str]], merge_files]
+    # 是否先用本地规则解析用户输入，默认开启
+    fast_parse: Optional[bool]
+    # 规则快速解析的置信度（走 LLM 解析时为空）
+    parse_confidence: Optional[float]
+    # 是否使用本地模板渲染样板文件，默认开启
+    use_templates: Optional[bool]
+    # 生成失败的文件路径
+    failed_files: Annotated[Optional[list[str]], merge_list]
+    # 使用了兜底结果的节点，此时本次生成的文件不完整，写盘时不删除上一次生成的文件
+    fallback_nodes: Annotated[Optional[list[str]], merge_list]
+    # 流式模式下已直接写入磁盘的文件及其内容哈希（内容不再保留在 state 中）
+    streamed_files: Annotated[Optional[Dict[str, str]], merge_files]
+    # 单个并发任务负责生成的文件路径（仅用于 Send 分发）
+    batch_paths: Optional[list[str]]
+    # 已由模板渲染的文件路径，作为上下文提供给并发任务（仅用于 Send 分发）
+    template_paths: Optional[list[str]]
+    # 项目输出的父目录，默认当前目录
+    output_dir: Optional[str]
+    # 只在内存中生成，文件内容保留在 files 中，不读写磁盘（服务模式使用）
+    in_memory: Optional[bool]
+    # 严格模式：LLM 节点重试耗尽后直接失败而不是使用兜底结果（配合检查点恢复）
+    strict: Optional[bool]
+    # 只计算与上一次生成的差异，不修改磁盘
+    dry_run: Optional[bool]
+    # 本次写盘的差异：added / changed / unchanged / removed
+    write_report: Optional[Dict[str, list[str]]]
     # 最终整合输出的内容
     output: Optional[str]
 
@@ -32,6 +284,16 @@ def start(state: AgentState) -> AgentState:
 
 def parse_input(state: AgentState) -> AgentState:
     user_input = state["user_input"]
+
+    # 描述中明确给出了各字段时，用本地规则直接提取，跳过一次 LLM 调用
+    if state.get("fast_parse") is not False:
+        params, confidence, unresolved = try_fast_path(user_input, FAST_PARSE_MIN_CONFIDENCE)
+        fast_path_stats.hit(params is not None)
+        if params is not None:
+            print(f"[快速解析] 置信度 {confidence}，解析结果: ", params)
+            return {"params": params, "parse_confidence": confidence}
+        print(f"[快速解析] 置信度 {confidence}，字段 {unresolved} 缺失或有歧义，交给 LLM 解析")
+
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
          你是一个专业的 Java 项目脚手架生成助手。
@@ -49,17 +311,15 @@ def parse_input(state: AgentState) -> AgentState:
         ("human", "{user_input}")
     ])
 
-    parser = JsonOutputParser()
-
-    chain = prompt | llm | parser
-
     try:
-        result = chain.invoke({"user_input": user_input})
+        result = call_llm(prompt, {"user_input": user_input}, JsonOutputParser())
         print("解析结果: ", result)
         return {"params": result}
     except Exception as e:
+        fallback_or_raise(state, "parse_input", e)
         print("[fallback] 使用默认参数:", e)
         return {
+            "fallback_nodes": ["parse_input"],
             "params": {
                 "projectName": "generate-code-project",
                 "jdkVersion": "17",
@@ -98,16 +358,15 @@ def generate_struct(state: AgentState) -> AgentState:
         ("human", "请输出结构。")
     ])
 
-    parser = JsonOutputParser()
-    chain = prompt | llm | parser
     try:
-        result = chain.invoke({})
+        result = call_llm(prompt, {}, JsonOutputParser())
         print("[结构结果]", result)
-        return {"structure": result, "params": params}
+        return {"structure": result}
     except Exception as e:
+        fallback_or_raise(state, "generate_structure", e)
         print("[fallback] 使用默认结构:", e)
         return {
-            "params": params,
+            "fallback_nodes": ["generate_structure"],
             "structure": [
                 {"type": "dir", "path": "src/main/java/com/example"},
                 {"type": "dir", "path": "src/test/java/com/example"},
@@ -117,11 +376,22 @@ def generate_struct(state: AgentState) -> AgentState:
         }
 
 
-def generate_files(state: AgentState) -> AgentState:
-    params = state["params"]
-    print("[节点] generate_files: LLM 生成文件内容")
+def template_files(state: AgentState) -> Dict[str, str]:
+    # 模板渲染只依赖 params，各节点可以各自计算，不需要等待 render_scaffold 节点
+    if state.get("use_templates") is False:
+        return {}
+    return render_templates(state["params"])
 
-    prompt = ChatPromptTemplate.from_messages([
+
+def render_scaffold(state: AgentState) -> AgentState:
+    files = template_files(state)
+    print(f"[节点] render_scaffold: 模板渲染 {len(files)} 个文件")
+    return {"files": files, "file_sources": {path: SOURCE_TEMPLATE for path in files}}
+
+
+def files_prompt(params: Dict[str, Any], skip_paths=()) -> ChatPromptTemplate:
+    skip_hint = f"以下文件已由模板生成，不要重复生成：{sorted(skip_paths)}" if skip_paths else ""
+    return ChatPromptTemplate.from_messages([
         ("system", f"""
     你是一个专业的java项目助手，确保生成的项目能够一键导入启动。
     
@@ -153,89 +423,443 @@ def generate_files(state: AgentState) -> AgentState:
     只输出一个 JSON 对象，不要任何额外的解释文字。
     
     切记，只能根据项目名生成单个项目的框架
+    {skip_hint}
     """),
         ("human", "请生成")
     ])
 
-    parser = JsonOutputParser()
-    chain = prompt | llm | parser
+
+def generate_files(state: AgentState) -> AgentState:
+    params = state["params"]
+    print("[节点] generate_files: LLM 生成文件内容")
+    covered = template_files(state)
+
     try:
-        result = chain.invoke({})
-        return {"files": result, "params": params}
+        # 容错解析：响应截断或局部格式错误时保留所有能恢复的文件
+        result = call_llm(files_prompt(params, covered), {}, RecoveringFilesParser())
     except Exception as e:
+        fallback_or_raise(state, "generate_files", e)
         print("[fallback] 文件生成失败:", e)
-        return {"files": {}, "params": params}
+        return {"files": {}, "fallback_nodes": ["generate_files"]}
 
+    files = {path: content for path, content in result.files.items() if path not in covered}
+    pending = [path for path in result.unrecoverable if path not in covered]
+    if pending:
+        # 只重新请求无法恢复的文件
+        print("[恢复] 以下文件内容无法恢复，重新生成:", pending)
+        all_paths = sorted(set(files) | set(pending) | set(covered))
+        regenerated, pending = request_files(state, "generate_files", all_paths, pending)
+        files.update(regenerated)
+    return {"files": files, "file_sources": {path: SOURCE_LLM for path in files}, "failed_files": pending}
 
-def write_to_disk(state: AgentState) -> AgentState:
-    structure = state["structure"]
-    files = state.get("files")
-    projectName = state["params"]['projectName']
-    print("files:", files)
 
-    if not structure or not files:
-        return {"output": "⚠️ 未生成结构或文件，跳过写入。"}
-    base_dir = "generate_project" if projectName is None else projectName
+class StreamingFileWriter:
+    """
+    写盘阶段：在独立线程中消费 (path, content)，与 LLM 的 token 流解析并行。
+    队列有上限，解析速度远快于写盘时会阻塞解析方，避免内容在内存中堆积。
+    实际写入交给 ProjectWriter，内容与上一次生成相同的文件不会重写。
+    """
 
-    project_path = Path(base_dir)
+    def __init__(self, writer: ProjectWriter, max_pending: int = 4):
+        self.writer = writer
+        # 写盘线程不继承节点的上下文，显式持有当前节点的指标
+        self.metrics_run = current_run()
+        self.written: Dict[str, str] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="streaming-file-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, content: str):
+        if self._error:
+            raise self._error
+        self._queue.put((path, content))
+
+    def close(self) -> Dict[str, str]:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            raise self._error
+        return self.written
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error:
+                continue
+            path, content = item
+            if not self.writer.is_safe(path):
+                continue
+            try:
+                digest, changed = self.writer.write_file(path, content)
+                self.written[path] = digest
+                if changed and self.metrics_run is not None:
+                    self.metrics_run.add(bytes_written=len(content.encode("utf-8")))
+                print(f"[流式写入] {path} ({len(content)} 字符{'' if changed else '，未变化'})")
+            except BaseException as e:
+                self._error = e
+
+
+def generate_files_streaming(state: AgentState) -> AgentState:
+    """
+    流式模式：边接收 LLM 的 token 边增量解析 JSON，每个文件一解析完成就交给写盘线程，
+    不再在 state 中保留文件内容，只记录已写入的路径。
+    """
+    if state.get("in_memory"):
+        # 内存模式没有写盘阶段，文件内容必须保留在 state 中
+        return generate_files(state)
+    params = state["params"]
+    print("[节点] generate_files: LLM 流式生成文件内容")
 
-    if project_path.exists():
-        import shutil
-        shutil.rmtree(project_path)
+    covered = template_files(state)
+    writer = StreamingFileWriter(ProjectWriter(get_project_path(state), dry_run=bool(state.get("dry_run"))))
+    try:
+        with closing(stream_llm(files_prompt(params, covered), {})) as chunks:
+            for path, content in iter_json_object_pairs(chunks):
+                if path not in covered:
+                    writer.submit(path, content)
+    except Exception as e:
+        written = writer.close()
+        fallback_or_raise(state, "generate_files", e)
+        print("[fallback] 流式文件生成中断:", e)
+        return {"streamed_files": written, "file_sources": {path: SOURCE_LLM for path in written},
+                "fallback_nodes": ["generate_files"]}
+    written = writer.close()
+    return {"streamed_files": written, "file_sources": {path: SOURCE_LLM for path in written}}
 
-    project_path.mkdir(exist_ok=True)
-    print(f"[写入] 创建项目目录: {project_path}")
 
-    for item in structure:
-        if item["type"] == "dir":
-            p = project_path / item["path"]
-            p.parent.mkdir(parents=True, exist_ok=True)
-            p.mkdir(exist_ok=True)
+def dispatch_files(state: AgentState, files_per_task: int = 1):
+    """
+    按文件拆分模式：把 generate_structure 得到的文件路径切分成每批 files_per_task 个，
+    每个批次通过 Send 分发给 generate_file_batch 并发生成（map 阶段）。
+    """
+    params = state["params"]
+    structure = state.get("structure") or []
+    files_per_task = max(1, files_per_task)
+    covered = template_files(state)
+    paths = [item["path"] for item in structure if item.get("type") == "file" and item["path"] not in covered]
+    # 没有文件时仍分发一个空批次，保证后续的汇合节点能被触发
+    batches = [paths[i:i + files_per_task] for i in range(0, len(paths), files_per_task)] or [[]]
+    print(f"[分发] {len(paths)} 个文件拆分为 {len(batches)} 个并发任务（{len(covered)} 个由模板渲染）")
+    return [
+        Send("generate_file_batch", {"params": params, "structure": structure, "batch_paths": batch,
+                                     "template_paths": sorted(covered), "use_templates": state.get("use_templates"),
+                                     "strict": state.get("strict")})
+        for batch in batches
+    ]
+
+
+def file_batch_prompt(params: Dict[str, Any], all_paths: list[str], batch_paths: list[str]) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", f"""
+    你是一个专业的java项目助手，确保生成的项目能够一键导入启动。
+    
+    项目名称为：{params['projectName']} 
+    项目包为: {params['company_package']}
+    项目参数:
+    - build_tool: {params['build_tool']}
+    - framework: {params['framework']}
+    - modules: {params['modules']}
+    - needs: {params['needs']}
+    - jdkVersion: {params['jdkVersion']}
+    
+    项目中的全部文件如下（用于保持包名、类名和依赖的一致性）：
+    {all_paths}
+    
+    本次只需要生成以下文件的内容：
+    {batch_paths}
+    
+    请生成一个 JSON 对象，key 为上面列出的文件相对路径，value 为该文件的具体内容（字符串）。
+    不要包含任何 Markdown、代码块、```
+    或者 ### 文件名: 这类文本。
+    只输出一个 JSON 对象，不要任何额外的解释文字。
+    """),
+        ("human", "请生成")
+    ])
+
+
+def request_files(state: AgentState, node: str, all_paths: list[str],
+                  paths: list[str]) -> tuple[Dict[str, str], list[str]]:
+    """
+    请求 LLM 生成指定文件，返回 (生成的文件, 仍然缺失的文件)。
+    每一轮只重新请求上一轮缺失或无法恢复的文件，已生成的文件不再重复生成。
+    """
+    params = state["params"]
+    files: Dict[str, str] = {}
+    pending = list(paths)
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        try:
+            # 缓存中只会有完整的结果；重试轮次不读缓存，缺少请求文件的响应也不写入缓存
+            result = call_llm(file_batch_prompt(params, all_paths, pending), {}, RecoveringFilesParser(),
+                              fresh=attempt > 1,
+                              cacheable=lambda r, wanted=tuple(pending): all(p in r.files for p in wanted))
+        except Exception as e:
+            fallback_or_raise(state, node, e)
+            print(f"[fallback] 文件生成失败 {pending}:", e)
+            break
+        files.update({path: content for path, content in result.files.items() if path in pending})
+        pending = [path for path in pending if path not in files]
+        if not pending:
+            break
+        print(f"[重试] 第 {attempt} 轮缺失文件:", pending)
+
+    if pending:
+        print("[警告] 以下文件未生成:", pending)
+    return files, pending
+
+
+def generate_file_batch(state: AgentState) -> AgentState:
+    batch_paths = state["batch_paths"]
+    all_paths = sorted({item["path"] for item in state.get("structure") or [] if item.get("type") == "file"}
+                       | set(state.get("template_paths") or []))
+    if not batch_paths:
+        print("[节点] generate_file_batch: 目录结构中没有文件，跳过生成")
+        return {"files": {}}
+    print(f"[节点] generate_file_batch: LLM 生成 {batch_paths}")
+
+    files, pending = request_files(state, "generate_file_batch", all_paths, batch_paths)
+    return {"files": files, "file_sources": {path: SOURCE_LLM for path in files}, "failed_files": pending}
+
+
+def get_project_path(state: AgentState) -> Path:
+    # 项目写到 output_dir（默认当前目录）下以项目名命名的目录中
+    project_name = state["params"].get("projectName")
+    return Path(state.get("output_dir") or ".") / ("generate_project" if project_name is None else project_name)
+
+
+def prepare_project(state: AgentState) -> AgentState:
+    # 创建项目根目录，不再清空已有内容：旧文件由 write_to_disk 根据清单增量更新或删除
+    project_path = get_project_path(state)
+    if state.get("in_memory"):
+        return {}
+    if state.get("dry_run"):
+        print(f"[预览] 项目目录: {project_path}")
+        return {}
+
+    project_path.mkdir(parents=True, exist_ok=True)
+    print(f"[写入] 项目目录: {project_path}")
+    return {}
+
+
+def create_dirs(state: AgentState) -> AgentState:
+    # 目录结构一返回就创建目录，不必等文件内容生成完成；重复或已存在的目录不再创建
+    if state.get("dry_run") or state.get("in_memory"):
+        return {}
+    project_path = get_project_path(state)
+    dirs = {project_path / item["path"] for item in state.get("structure") or [] if item["type"] == "dir"}
+    for p in sorted(dirs):
+        if not p.is_dir():
+            p.mkdir(parents=True, exist_ok=True)
             print(f"[目录] {p}")
+    return {}
+
 
-    for fname, content in files.items():
-        p = project_path / fname
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding="utf-8")
-        print(f"[文件] {p} ({len(content)} 字符)")
+def join_results(state: AgentState) -> AgentState:
+    # 汇合节点：等待目录结构与文件内容两个分支都完成
+    files_count = len(state.get("files") or {}) + len(state.get("streamed_files") or {})
+    print(f"[汇合] 目录项 {len(state.get('structure') or [])} 个，文件 {files_count} 个")
+    return {}
 
+
+def write_to_disk(state: AgentState) -> AgentState:
+    structure = state["structure"]
+    files = state.get("files") or {}
+    streamed_files = state.get("streamed_files") or {}
+    dry_run = bool(state.get("dry_run"))
+
+    if not structure or not (files or streamed_files):
+        return {"output": "⚠️ 未生成结构或文件，跳过写入。"}
+    if state.get("in_memory"):
+        return {"output": f"📦 项目已在内存中生成，共 {len(files)} 个文件"}
+
+    project_path = get_project_path(state)
+    if streamed_files:
+        print(f"[写入] 流式阶段已处理 {len(streamed_files)} 个文件")
+
+    writer = ProjectWriter(project_path, dry_run=dry_run)
+    # 生成失败的文件保留上一次的版本；有节点使用了兜底结果时不删除任何旧文件
+    fallback_nodes = state.get("fallback_nodes") or []
+    if fallback_nodes:
+        print("[写入] 以下节点使用了兜底结果，本次不删除旧文件:", fallback_nodes)
+    report = writer.sync(files, streamed_files, keep=state.get("failed_files") or [],
+                         prune=not fallback_nodes)
+    record(bytes_written=writer.bytes_written)
+    for kind in ("added", "changed", "removed"):
+        for path in report[kind]:
+            print(f"[{'预览' if dry_run else '文件'}] {kind}: {project_path / path}")
+    summary = "，".join(f"{kind} {len(paths)}" for kind, paths in report.items())
+
+    if dry_run:
+        return {"write_report": report, "output": f"🔍 预览模式未写入磁盘（{summary}）：{project_path.absolute()}"}
     return {
-        "output": f"✅ 项目已生成到本地文件夹：{project_path.absolute()}"
+        "write_report": report,
+        "output": f"✅ 项目已生成到本地文件夹（{summary}）：{project_path.absolute()}"
     }
 
 
 def generate_output(state: AgentState) -> AgentState:
     output = state.get("output", "📦 项目已生成（无详细输出）")
+    sources = state.get("file_sources") or {}
+    template_rendered = sorted(path for path, source in sources.items() if source == SOURCE_TEMPLATE)
+    llm_generated = sorted(path for path, source in sources.items() if source == SOURCE_LLM)
+    print(f"[来源] 模板渲染 {len(template_rendered)} 个文件:", template_rendered)
+    print(f"[来源] LLM 生成 {len(llm_generated)} 个文件:", llm_generated)
+    print("[缓存] 统计:", llm_cache.stats())
+    print("[快速解析] 统计:", fast_path_stats.stats())
+    print("[对冲] 统计:", llm_invoker.stats())
     return {"output": output}
 
 
-def builder_workflow():
+def sqlite_checkpointer(path: str = DEFAULT_CHECKPOINT_PATH):
+    """基于本地 SQLite 文件的检查点，同一 thread_id 的运行可以从最后一个成功的节点恢复。"""
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
+def builder_workflow(file_mode: str = FILE_MODE_BULK, files_per_task: int = 1, parallel: bool = True,
+                     stream_files: bool = False, checkpointer=None,
+                     metrics: Optional[MetricsRecorder] = METRICS):
+    """
+    file_mode:
+      - FILE_MODE_BULK: 一次 LLM 调用生成全部文件
+      - FILE_MODE_PER_FILE: 按 generate_structure 的文件路径拆分，并发生成后合并到 files，
+        每个并发任务生成 files_per_task 个文件，并发上限通过运行时 config 的 max_concurrency 控制
+    parallel:
+      - True: 扇出/汇合的 DAG，目录结构生成（及目录创建）与文件生成并行执行，在 join 处汇合后写盘
+      - False: 所有节点按顺序串行执行
+    stream_files:
+      - 仅对 FILE_MODE_BULK 生效，流式解析 LLM 输出，每个文件解析完成立即写盘
+    样板文件由 render_scaffold 节点用本地模板渲染，LLM 只生成模板未覆盖的文件，
+    可在输入 state 中设置 use_templates=False 关闭。
+    checkpointer:
+      - 传入检查点（如 sqlite_checkpointer()）后，运行时需在 config 中指定 thread_id；
+        失败后以 None 作为输入、相同的 thread_id 再次运行即可从最后一个成功的节点恢复，
+        并发生成中已成功的文件批次不会重新生成。通常与输入 state 中的 strict=True 一起使用。
+    metrics:
+      - 包装每个节点记录耗时、token、重试、缓存与写盘指标，传 None 关闭
+    """
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("start", start)
-    workflow.add_node("parse_input", parse_input)
-    workflow.add_node("generate_structure", generate_struct)
-    workflow.add_node("generate_files", generate_files)
-    workflow.add_node("write_to_disk", write_to_disk)
-    workflow.add_node("generate_output", generate_output)
+    def add_node(name: str, fn):
+        # 所有节点统一经过指标包装
+        workflow.add_node(name, metrics.instrument(name, fn) if metrics is not None else fn)
+
+    add_node("start", start)
+    add_node("parse_input", parse_input)
+    add_node("prepare_project", prepare_project)
+    add_node("generate_structure", generate_struct)
+    add_node("create_dirs", create_dirs)
+    add_node("render_scaffold", render_scaffold)
+    add_node("join", join_results)
+    add_node("write_to_disk", write_to_disk)
+    add_node("generate_output", generate_output)
 
     workflow.add_edge(START, "start")
     workflow.add_edge("start", "parse_input")
-    workflow.add_edge("parse_input", "generate_structure")
-    workflow.add_edge("generate_structure", "generate_files")
-    workflow.add_edge("generate_files", "write_to_disk")
+    workflow.add_edge("parse_input", "prepare_project")
+    workflow.add_edge("prepare_project", "generate_structure")
+    workflow.add_edge("generate_structure", "create_dirs")
+    # 模板渲染只依赖 params：并行模式下与其它分支同时执行
+    workflow.add_edge("prepare_project" if parallel else "create_dirs", "render_scaffold")
+
+    if file_mode == FILE_MODE_PER_FILE:
+        # 按文件生成依赖目录结构：并行模式下与 create_dirs 同时执行，串行模式下排在最后
+        add_node("generate_file_batch", generate_file_batch)
+        workflow.add_conditional_edges("generate_structure" if parallel else "render_scaffold",
+                                       partial(dispatch_files, files_per_task=files_per_task),
+                                       ["generate_file_batch"])
+        files_node = "generate_file_batch"
+    else:
+        # 整体生成只依赖 params：并行模式下与 generate_structure 同时执行
+        add_node("generate_files", generate_files_streaming if stream_files else generate_files)
+        workflow.add_edge("prepare_project" if parallel else "render_scaffold", "generate_files")
+        files_node = "generate_files"
+
+    if parallel:
+        workflow.add_edge(["create_dirs", "render_scaffold", files_node], "join")
+    else:
+        workflow.add_edge(files_node, "join")
+
+    workflow.add_edge("join", "write_to_disk")
     workflow.add_edge("write_to_disk", "generate_output")
     workflow.add_edge("generate_output", END)
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
-if __name__ == '__main__':
+def draw_graph(app, path: str, method: str = "mermaid"):
+    """
+    渲染图结构：
+      - mermaid: 只输出 Mermaid 源码文本，完全离线
+      - local: 使用本地浏览器（pyppeteer）渲染 PNG，不访问外部服务
+      - api: 通过 mermaid.ink 远程服务渲染 PNG（原有行为，需要网络）
+    """
+    graph = app.get_graph()
+    if method == "mermaid":
+        Path(path).write_text(graph.draw_mermaid(), encoding="utf-8")
+    else:
+        from langchain_core.runnables.graph import MermaidDrawMethod
+        draw_method = MermaidDrawMethod.PYPPETEER if method == "local" else MermaidDrawMethod.API
+        Path(path).write_bytes(graph.draw_mermaid_png(draw_method=draw_method))
+    print(f"[图] 已输出到 {path}")
+
+
+def profile_startup(target_ms: float = STARTUP_TARGET_MS) -> bool:
+    # 分阶段统计启动耗时：模块导入、图编译、首次创建 LLM 客户端
+    imported = time.perf_counter()
+    builder_workflow(file_mode=FILE_MODE_PER_FILE)
+    compiled = time.perf_counter()
+    from openai import OpenAIError
+    try:
+        get_llm()
+        client_error = None
+    except OpenAIError as e:
+        # 未配置 OPENAI_API_KEY 等情况下无法创建客户端，不影响启动耗时的统计
+        client_error = e
+    client_ready = time.perf_counter()
+
+    startup_ms = (compiled - _IMPORT_STARTED) * 1000
+    print(f"[启动] 模块导入: {(imported - _IMPORT_STARTED) * 1000:.1f} ms")
+    print(f"[启动] 图编译: {(compiled - imported) * 1000:.1f} ms")
+    if client_error is None:
+        print(f"[启动] LLM 客户端创建（首次调用时才发生）: {(client_ready - compiled) * 1000:.1f} ms")
+    else:
+        print(f"[启动] LLM 客户端创建: 已跳过（{client_error}）")
+    ok = startup_ms <= target_ms
+    print(f"[启动] 可运行耗时 {startup_ms:.1f} ms，目标 {target_ms:.0f} ms：{'达标' if ok else '未达标'}")
+    return ok
 
-    app = builder_workflow()
 
-    graph_png = app.get_graph().draw_mermaid_png()
-    with open("single-generate-code-agent.png", "wb") as f:
-        f.write(graph_png)
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='生成 Java 项目脚手架。')
+    arg_parser.add_argument('--checkpoint', default=None,
+                            help=f'启用 SQLite 检查点文件，例如 {DEFAULT_CHECKPOINT_PATH}')
+    arg_parser.add_argument('--thread-id', default=None,
+                            help='检查点中的运行 ID；不加 --resume 时作为前缀生成新的运行 ID（默认: run）')
+    arg_parser.add_argument('--resume', action='store_true', help='从检查点中该运行 ID 最后一个成功的节点继续')
+    arg_parser.add_argument('--draw-graph', nargs='?', const='single-generate-code-agent.mmd', default=None,
+                            help='输出图结构（默认: single-generate-code-agent.mmd）')
+    arg_parser.add_argument('--draw-method', choices=['mermaid', 'local', 'api'], default='mermaid',
+                            help='图渲染方式：mermaid 文本 / 本地渲染 PNG / 远程服务渲染 PNG（默认: mermaid）')
+    arg_parser.add_argument('--profile-startup', action='store_true',
+                            help=f'统计启动耗时并与目标（{STARTUP_TARGET_MS:.0f} ms）比较后退出')
+    arg_parser.add_argument('--metrics-jsonl', default=METRICS.jsonl_path, help='逐节点指标 JSON Lines 输出文件')
+    arg_parser.add_argument('--metrics-prom', default=METRICS.prom_path, help='Prometheus 文本格式指标输出文件')
+    args = arg_parser.parse_args()
+    METRICS.jsonl_path, METRICS.prom_path = args.metrics_jsonl, args.metrics_prom
+
+    if args.profile_startup:
+        raise SystemExit(0 if profile_startup() else 1)
+    if args.resume and not args.thread_id:
+        arg_parser.error('--resume 需要通过 --thread-id 指定要继续的运行')
+
+    checkpointer = sqlite_checkpointer(args.checkpoint) if args.checkpoint else None
+    app = builder_workflow(file_mode=FILE_MODE_PER_FILE, checkpointer=checkpointer)
+
+    if args.draw_graph:
+        draw_graph(app, args.draw_graph, args.draw_method)
 
     user_input = """
     帮我创建一个 Spring Boot + Maven  的 Java17 项目,
@@ -243,10 +867,16 @@ if __name__ == '__main__':
     公司设置为com.microsoft，
     包含 REST API 层、Service 层、Repository 层，还要有单元测试和 Docker 支持。
     """
-    state = {"user_input": user_input}
+    # 只有恢复时才复用运行 ID；新的运行若复用旧 ID，上一次的 files / failed_files 等会经 reducer 合并进来
+    thread_id = args.thread_id if args.resume else f"{args.thread_id or 'run'}-{uuid4().hex[:8]}"
+    if checkpointer is not None:
+        print(f"[检查点] 运行 ID: {thread_id}，失败后可用 --resume --thread-id {thread_id} 继续")
+    config = {"max_concurrency": MAX_CONCURRENCY, "configurable": {"thread_id": thread_id}}
+    # 恢复时输入为 None，从检查点继续；使用检查点时开启严格模式，失败的节点不会被兜底结果掩盖
+    state = None if args.resume else {"user_input": user_input, "strict": checkpointer is not None}
     print("\n🚀 开始运行 Java 项目生成 Agent（含本地磁盘写入）...\n")
 
-    for event in app.stream(state):
+    for event in app.stream(state, config=config):
         for node, output in event.items():
             print(f"【节点 {node}】输出:")
             pprint.pprint(output)
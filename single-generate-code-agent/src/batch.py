@@ -0,0 +1,144 @@
+import argparse
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from agent import builder_workflow, sqlite_checkpointer, FILE_MODE_BULK, FILE_MODE_PER_FILE, MAX_CONCURRENCY
+
+
+def load_specs(specs_file: str) -> list[Dict[str, Any]]:
+    """
+    读取 JSONL 格式的项目描述，每行一个对象：
+      {"id": "order-service", "user_input": "帮我创建一个 ...", "use_templates": true, "dry_run": false}
+    只有 user_input 是必填的，缺少 id 时按行号生成。
+    """
+    specs = []
+    with open(specs_file, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            spec = json.loads(line)
+            if not spec.get("user_input"):
+                raise ValueError(f"{specs_file}:{line_no} 缺少 user_input")
+            spec.setdefault("id", f"item-{line_no}")
+            specs.append(spec)
+    return specs
+
+
+def _safe_dir_name(item_id: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(item_id)) or "item"
+
+
+def load_thread_ids(results_file: str) -> Dict[str, str]:
+    """读取上一次批量运行的结果文件，返回 项目 id -> 运行 ID，用于继续未完成的项目。"""
+    thread_ids = {}
+    if not Path(results_file).exists():
+        return thread_ids
+    with open(results_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("thread_id"):
+                thread_ids[str(result["id"])] = result["thread_id"]
+    return thread_ids
+
+
+def run_one(app, spec: Dict[str, Any], out_dir: Path, max_concurrency: int,
+            checkpointed: bool = False, previous_thread: Optional[str] = None) -> Dict[str, Any]:
+    # 每个项目写到 out_dir/<id>/<projectName>，互不干扰
+    state = {
+        "user_input": spec["user_input"],
+        "output_dir": str(out_dir / _safe_dir_name(spec["id"])),
+        "use_templates": spec.get("use_templates"),
+        "dry_run": spec.get("dry_run"),
+        "strict": checkpointed,
+    }
+    started = time.perf_counter()
+    result = {"id": spec["id"], "output_dir": state["output_dir"]}
+    try:
+        # 上一次的运行在检查点中未完成时，从最后一个成功的节点继续；
+        # 否则使用新的运行 ID，避免上一次的 files / failed_files 等经 reducer 合并进本次结果
+        config = {"max_concurrency": max_concurrency, "configurable": {"thread_id": previous_thread}}
+        resumed = checkpointed and previous_thread is not None and bool(app.get_state(config).next)
+        if not resumed:
+            config["configurable"]["thread_id"] = f"{spec['id']}-{uuid4().hex[:8]}"
+        result["thread_id"] = config["configurable"]["thread_id"]
+        final_state = app.invoke(None if resumed else state, config=config)
+        result.update({
+            "status": "ok",
+            "resumed": resumed,
+            "project_name": (final_state.get("params") or {}).get("projectName"),
+            "files": len(final_state.get("file_sources") or {}),
+            "write_report": {kind: len(paths) for kind, paths in (final_state.get("write_report") or {}).items()},
+            "output": final_state.get("output"),
+        })
+    except Exception as e:
+        result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(specs_file: str, out_dir: str, results_file: str, workers: int, file_mode: str,
+              parallel: bool, max_concurrency: int, checkpoint: str = None) -> Dict[str, Any]:
+    specs = load_specs(specs_file)
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    # 图只编译一次，在所有工作线程间共享
+    checkpointer = sqlite_checkpointer(checkpoint) if checkpoint else None
+    app = builder_workflow(file_mode=file_mode, parallel=parallel, checkpointer=checkpointer)
+
+    # 结果文件会被覆盖，先记下上一次每个项目的运行 ID
+    thread_ids = load_thread_ids(results_file) if checkpointer is not None else {}
+    started = time.perf_counter()
+    ok = failed = 0
+    with open(results_file, "w", encoding="utf-8") as results, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [pool.submit(run_one, app, spec, out_path, max_concurrency, checkpointer is not None,
+                               thread_ids.get(str(spec["id"]))) for spec in specs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.write(json.dumps(result, ensure_ascii=False) + "\n")
+            results.flush()
+            if result["status"] == "ok":
+                ok += 1
+            else:
+                failed += 1
+            print(f"[批量] {result['id']}: {result['status']} ({result['seconds']}s)")
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "total": len(specs),
+        "ok": ok,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "projects_per_minute": round(len(specs) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+    }
+    print(f"\n✅ 批量生成完成: {summary}")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量生成 Java 项目脚手架。')
+    parser.add_argument('specs_file', help='JSONL 格式的项目描述文件，每行包含 user_input')
+    parser.add_argument('--out', default='generated', help='项目输出根目录（默认: generated）')
+    parser.add_argument('--results', default='batch_results.jsonl', help='逐项结果输出文件（默认: batch_results.jsonl）')
+    parser.add_argument('--workers', type=int, default=4, help='同时生成的项目数（默认: 4）')
+    parser.add_argument('--file-mode', choices=[FILE_MODE_BULK, FILE_MODE_PER_FILE], default=FILE_MODE_PER_FILE,
+                        help='文件生成模式（默认: per_file）')
+    parser.add_argument('--sequential', action='store_true', help='图内节点串行执行')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f'单个项目内的 LLM 并发上限（默认: {MAX_CONCURRENCY}）')
+    parser.add_argument('--checkpoint', default=None,
+                        help='SQLite 检查点文件；以同一结果文件再次运行该批次时，失败的项目从最后一个成功的节点继续')
+    args = parser.parse_args()
+
+    run_batch(args.specs_file, args.out, args.results, args.workers, args.file_mode,
+              not args.sequential, args.max_concurrency, args.checkpoint)
@@ -0,0 +1,234 @@
+import argparse
+import ast
+import json
+import multiprocessing
+import re
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# 不同规模的项目：模块数与每个模块的源文件数
+SPECS: Dict[str, Dict[str, int]] = {
+    "small": {"modules": 2, "files_per_module": 2, "file_bytes": 1024},
+    "medium": {"modules": 6, "files_per_module": 5, "file_bytes": 2048},
+    "large": {"modules": 15, "files_per_module": 10, "file_bytes": 4096},
+}
+
+LAYERS = ["Controller", "Service", "ServiceImpl", "Repository", "Entity", "Dto", "Mapper", "Config", "Util", "Test"]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    本地的假模型：按 responder 返回的内容应答，并模拟首包延迟与输出速率，不访问网络。
+    """
+    responder: Callable[[List[BaseMessage]], str]
+    latency: float = 0.2
+    tokens_per_second: float = 300.0
+    chars_per_token: int = 4
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-codegen"
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // self.chars_per_token
+        completion_tokens = len(text) // self.chars_per_token
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self.responder(messages)
+        time.sleep(self.latency + len(text) / self.chars_per_token / self.tokens_per_second)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text = self.responder(messages)
+        time.sleep(self.latency)
+        # 每个分片约 16 个 token
+        step = self.chars_per_token * 16
+        for offset in range(0, len(text), step):
+            piece = text[offset:offset + step]
+            time.sleep(len(piece) / self.chars_per_token / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+
+def spec_paths(size: str, spec: Dict[str, int]) -> List[str]:
+    base = "src/main/java/com/bench"
+    paths = ["README.md"]
+    for m in range(spec["modules"]):
+        for f in range(spec["files_per_module"]):
+            paths.append(f"{base}/module{m}/Module{m}{LAYERS[f % len(LAYERS)]}{f // len(LAYERS) or ''}.java")
+    return paths
+
+
+def canned_responder(size: str, spec: Dict[str, int]) -> Callable[[List[BaseMessage]], str]:
+    """根据提示词判断是哪个节点在调用，返回该规模下确定的应答。"""
+    paths = spec_paths(size, spec)
+    params = {
+        "projectName": f"bench-{size}",
+        "jdkVersion": "17",
+        "build_tool": "maven",
+        "framework": "spring_boot",
+        "modules": [f"module{m}" for m in range(spec["modules"])],
+        "needs": ["rest_controller", "unit_test", "docker"],
+        "company_package": "com.bench",
+    }
+
+    def file_content(path: str) -> str:
+        body = f"// {path}\n"
+        return body + "x" * max(0, spec["file_bytes"] - len(body))
+
+    def respond(messages: List[BaseMessage]) -> str:
+        system = str(messages[0].content)
+        if "提取以下结构化信息" in system:
+            return json.dumps(params, ensure_ascii=False)
+        if "生成Java 项目目录结构" in system:
+            dirs = sorted({p.rsplit("/", 1)[0] for p in paths if "/" in p})
+            return json.dumps([{"type": "dir", "path": d} for d in dirs]
+                              + [{"type": "file", "path": p} for p in paths])
+        match = re.search(r"本次只需要生成以下文件的内容：\s*(\[.*?\])", system, re.S)
+        requested = ast.literal_eval(match.group(1)) if match else paths
+        return json.dumps({p: file_content(p) for p in requested}, ensure_ascii=False)
+
+    return respond
+
+
+def recorded_responder(path: str, fallback: Callable[[List[BaseMessage]], str]) -> Callable[[List[BaseMessage]], str]:
+    """使用 LLM 缓存文件中录制的真实应答，未录制的请求回退到预置应答。"""
+    from agent import LLM_MODEL, LLM_TEMPERATURE
+    from llm_cache import LLMCache, make_cache_key
+
+    recorded = LLMCache(path=path, max_age_seconds=sys.maxsize)
+
+    def respond(messages: List[BaseMessage]) -> str:
+        key = make_cache_key(LLM_MODEL, [(m.type, m.content) for m in messages], LLM_TEMPERATURE)
+        text = recorded.get(key)
+        return text if text is not None else fallback(messages)
+
+    return respond
+
+
+def run_scenario(size: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """在独立进程中运行一个规模的完整工作流，保证峰值内存互不干扰。"""
+    import agent
+    from metrics import MetricsRecorder
+
+    runs: List[Dict[str, Any]] = []
+
+    class CollectingRecorder(MetricsRecorder):
+        def record(self, run):
+            runs.append(run.to_dict())
+            super().record(run)
+
+    spec = SPECS[size]
+    responder = canned_responder(size, spec)
+    if options.get("recorded"):
+        responder = recorded_responder(options["recorded"], responder)
+    agent.set_llm(FakeChatModel(responder=responder, latency=options["latency"],
+                                tokens_per_second=options["tokens_per_second"]))
+    # 基准测试测量的是生成流程本身，不使用 LLM 缓存
+    agent.llm_cache.bypass = True
+
+    app = agent.builder_workflow(file_mode=options["file_mode"], parallel=not options["sequential"],
+                                 stream_files=options["stream_files"], metrics=CollectingRecorder())
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory(prefix="codegen-bench-") as out_dir:
+        started = time.perf_counter()
+        final_state = app.invoke({"user_input": f"bench {size}", "output_dir": out_dir},
+                                 config={"max_concurrency": options["max_concurrency"]})
+        elapsed = time.perf_counter() - started
+
+    nodes: Dict[str, Dict[str, float]] = {}
+    for run in runs:
+        node = nodes.setdefault(run["node"], {"runs": 0, "seconds": 0.0, "max_seconds": 0.0, "bytes_written": 0})
+        node["runs"] += 1
+        node["seconds"] += run["wall_seconds"]
+        node["max_seconds"] = max(node["max_seconds"], run["wall_seconds"])
+        node["bytes_written"] += run["bytes_written"]
+
+    # write_report 已包含流式写入的文件
+    report = final_state.get("write_report") or {}
+    files_written = len(report.get("added", [])) + len(report.get("changed", []))
+    return {
+        "size": size,
+        "files": len(final_state.get("file_sources") or {}),
+        "files_written": files_written,
+        "seconds": round(elapsed, 4),
+        "files_per_second": round(files_written / elapsed, 2) if elapsed > 0 else 0.0,
+        # Linux 下 ru_maxrss 单位为 KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+        "nodes": {name: {k: round(v, 4) for k, v in stats.items()} for name, stats in sorted(nodes.items())},
+    }
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_file: str, tolerance: float) -> List[str]:
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {item["size"]: item for item in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        base = baseline.get(result["size"])
+        if base and result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{result['size']}: {base['seconds']}s -> {result['seconds']}s")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from agent import FILE_MODE_BULK, FILE_MODE_PER_FILE, MAX_CONCURRENCY
+
+    parser = argparse.ArgumentParser(description='使用本地假模型离线测试代码生成工作流的性能。')
+    parser.add_argument('--sizes', nargs='+', choices=list(SPECS), default=list(SPECS), help='要运行的项目规模')
+    parser.add_argument('--file-mode', choices=[FILE_MODE_BULK, FILE_MODE_PER_FILE], default=FILE_MODE_PER_FILE)
+    parser.add_argument('--sequential', action='store_true', help='图内节点串行执行')
+    parser.add_argument('--stream-files', action='store_true', help='整体生成时流式写盘')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY)
+    parser.add_argument('--latency', type=float, default=0.2, help='假模型的首包延迟（秒，默认: 0.2）')
+    parser.add_argument('--tokens-per-second', type=float, default=300.0, help='假模型的输出速率（默认: 300）')
+    parser.add_argument('--recorded', default=None, help='录制了真实应答的 LLM 缓存文件（SQLite）')
+    parser.add_argument('--output', default='bench_results.json', help='结果输出文件（默认: bench_results.json）')
+    parser.add_argument('--baseline', default=None, help='对比的基线结果文件，耗时超出容差时返回非零退出码')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='相对基线允许的耗时增长比例（默认: 0.2）')
+    args = parser.parse_args(argv)
+
+    options = {
+        "file_mode": args.file_mode,
+        "sequential": args.sequential,
+        "stream_files": args.stream_files,
+        "max_concurrency": args.max_concurrency,
+        "latency": args.latency,
+        "tokens_per_second": args.tokens_per_second,
+        "recorded": args.recorded,
+    }
+    results = []
+    for size in args.sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(run_scenario, size, options).result()
+        results.append(result)
+        print(f"[基准] {size}: {result['files']} 个文件，端到端 {result['seconds']}s，"
+              f"写盘 {result['files_per_second']} 个/秒，峰值 RSS {result['peak_rss_mb']} MB")
+        for node, stats in result["nodes"].items():
+            print(f"    {node:<20} {stats['seconds']:>8.3f}s  (x{int(stats['runs'])}, 最长 {stats['max_seconds']:.3f}s)")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"options": options, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"[基准] 结果已写入 {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("[基准] 性能回退:", regressions)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
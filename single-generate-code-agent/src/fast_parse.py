@@ -0,0 +1,189 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# 每个字段的关键词词典（中英文），值为规范化后的取值
+BUILD_TOOLS = {
+    "maven": ["maven", "mvn"],
+    "gradle": ["gradle"],
+}
+
+FRAMEWORKS = {
+    "spring_boot": ["spring boot", "springboot", "spring-boot", "spring_boot"],
+    "none": ["不使用框架", "无框架", "纯 java", "纯java", "plain java", "no framework"],
+}
+
+MODULES = {
+    "api": ["rest api", "api 层", "api层", "controller 层", "controller层", "接口层", "控制层", "api layer"],
+    "service": ["service 层", "service层", "服务层", "业务层", "service layer"],
+    "repository": ["repository 层", "repository层", "数据访问层", "持久层", "dao 层", "dao层", "repository layer"],
+}
+
+NEEDS = {
+    "rest_controller": ["rest api", "rest 接口", "restful", "rest controller", "rest_controller"],
+    "unit_test": ["单元测试", "unit test", "junit"],
+    "docker": ["docker", "容器化", "dockerfile"],
+}
+
+DEFAULT_COMPANY_PACKAGE = "com.nq"
+
+_PROJECT_NAME = re.compile(
+    r"(?:项目名称|项目名|工程名|project[\s_-]*name\b|artifact[\s_-]*(?:id)?\b|named\b|called\b)"
+    r"\s*(?:为|是|叫|:|：|=|is)?\s*[\"'`“]?([A-Za-z][\w.-]*)",
+    re.I)
+_JDK_VERSION = re.compile(r"(?:java|jdk|openjdk)\s*[-_]?\s*(1\.8|8|11|17|21)\b", re.I)
+_COMPANY_PACKAGE = re.compile(
+    r"(?:公司(?:包名|包)?|包名|组织|group\s*id|groupid|package|company)\s*(?:设置)?\s*(?:为|是|:|：|=|is)?\s*"
+    r"([a-z][a-z0-9_]*(?:\.[a-z][a-z0-9_]*)+)", re.I)
+
+# 关键词前的否定词，例如 "不需要 docker"、"without docker"、"don't add docker"、"skip docker"
+_NEGATION = re.compile(
+    r"(?:不需要|不要|无需|不用|不使用|不含|不包含|没有|去掉|\bwithout|\bno|\bnot|\bdon['’]?t|\bdo\s+not|\bskip"
+    r"|\bexclude|\bexcluding|\bomit)"
+    r"\s*(?:使用|添加|包含|生成|include|use|add|need|any|create|generate)?\s*(?:the|a|an|any)?\s*[:：]?\s*$")
+# 关键词后的否定词，例如 "docker 不需要"、"docker is not needed"
+_NEGATION_AFTER = re.compile(
+    r"(?:不需要|不要|不用|无需|不必|不包含|不含|去掉|省略|\bnot\s+(?:needed|required|necessary)"
+    r"|\bisn['’]?t\s+(?:needed|required)|\bunnecessary)")
+# 关键词后的否定词只在同一分句内查找
+_CLAUSE_END = re.compile(r"[，,。.;；!！?？\n]")
+# 否定词前后的文本窗口（字符数）
+_NEGATION_WINDOW = 16
+# 出现否定描述时额外扣减的置信度，保证交给 LLM 理解
+NEGATION_PENALTY = 0.3
+
+# 字段权重：用于计算置信度，越关键的字段权重越高
+FIELD_WEIGHTS = {
+    "projectName": 0.2,
+    "jdkVersion": 0.15,
+    "build_tool": 0.2,
+    "framework": 0.15,
+    "modules": 0.1,
+    "needs": 0.1,
+    "company_package": 0.1,
+}
+
+# 必须明确识别出的字段，缺失时回退到 LLM
+REQUIRED_FIELDS = ("projectName", "jdkVersion", "build_tool", "framework")
+
+
+def _is_negated(text: str, keyword: str) -> bool:
+    """关键词的任意一次出现前面紧跟否定词，或同一分句内后面跟着否定词。拿不准时按否定处理，交给 LLM。"""
+    start = text.find(keyword)
+    while start != -1:
+        if _NEGATION.search(text[max(0, start - _NEGATION_WINDOW):start]):
+            return True
+        end = start + len(keyword)
+        after = _CLAUSE_END.split(text[end:end + _NEGATION_WINDOW], 1)[0]
+        if _NEGATION_AFTER.search(after):
+            return True
+        start = text.find(keyword, start + 1)
+    return False
+
+
+def _match(text: str, dictionary: Dict[str, List[str]]) -> Tuple[List[str], List[str]]:
+    """返回 (命中的值, 被否定的值)。"""
+    hits, negated = [], []
+    for value, keywords in dictionary.items():
+        found = [k for k in keywords if k in text]
+        if not found:
+            continue
+        if any(_is_negated(text, k) for k in found):
+            negated.append(value)
+        else:
+            hits.append(value)
+    return hits, negated
+
+
+def _match_one(text: str, dictionary: Dict[str, List[str]]) -> Tuple[Optional[str], bool]:
+    """返回 (命中的值, 是否有歧义)。命中多个不同的值或出现否定描述视为有歧义。"""
+    hits, negated = _match(text, dictionary)
+    if len(hits) == 1 and not negated:
+        return hits[0], False
+    return None, len(hits) > 1 or bool(negated)
+
+
+def _match_all(text: str, dictionary: Dict[str, List[str]]) -> Tuple[List[str], bool]:
+    """返回 (命中的值, 是否出现否定描述)，被否定的值不计入。"""
+    hits, negated = _match(text, dictionary)
+    return hits, bool(negated)
+
+
+def extract_params(user_input: str) -> Tuple[Dict[str, Any], float, List[str]]:
+    """
+    用关键词和正则从用户描述中提取项目参数。
+    返回 (params, 置信度 0~1, 缺失或有歧义的字段)。
+    """
+    text = user_input.lower()
+    params: Dict[str, Any] = {}
+    unresolved: List[str] = []
+
+    # 出现多个不同的项目名视为有歧义
+    names = {name.rstrip(".-") for name in _PROJECT_NAME.findall(user_input)}
+    if len(names) == 1:
+        params["projectName"] = names.pop()
+    else:
+        unresolved.append("projectName")
+
+    versions = {"8" if v == "1.8" else v for v in _JDK_VERSION.findall(text)}
+    if len(versions) == 1:
+        params["jdkVersion"] = versions.pop()
+    else:
+        unresolved.append("jdkVersion")
+
+    for field, dictionary in (("build_tool", BUILD_TOOLS), ("framework", FRAMEWORKS)):
+        value, _ = _match_one(text, dictionary)
+        if value:
+            params[field] = value
+        else:
+            unresolved.append(field)
+
+    negated_fields = []
+    for field, dictionary in (("modules", MODULES), ("needs", NEEDS)):
+        params[field], negated = _match_all(text, dictionary)
+        if negated:
+            negated_fields.append(field)
+    if not params["modules"] or "modules" in negated_fields:
+        unresolved.append("modules")
+    if "needs" in negated_fields:
+        unresolved.append("needs")
+
+    match = _COMPANY_PACKAGE.search(user_input)
+    params["company_package"] = match.group(1).lower() if match else DEFAULT_COMPANY_PACKAGE
+
+    confidence = sum(weight for field, weight in FIELD_WEIGHTS.items() if field not in unresolved)
+    if negated_fields:
+        confidence = max(0.0, confidence - NEGATION_PENALTY)
+    return params, round(confidence, 3), unresolved
+
+
+class FastPathStats:
+    """统计快速路径命中率。"""
+
+    def __init__(self):
+        self.fast = 0
+        self.fallback = 0
+        self._lock = threading.Lock()
+
+    def hit(self, fast: bool):
+        with self._lock:
+            if fast:
+                self.fast += 1
+            else:
+                self.fallback += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.fast + self.fallback
+        return {
+            "fast_path": self.fast,
+            "llm_fallback": self.fallback,
+            "fast_path_rate": round(self.fast / total, 4) if total else 0.0,
+        }
+
+
+def try_fast_path(user_input: str, min_confidence: float) -> Tuple[Optional[Dict[str, Any]], float, List[str]]:
+    """必填字段全部明确且置信度达到阈值时返回 params，否则返回 None 交给 LLM。"""
+    params, confidence, unresolved = extract_params(user_input)
+    if confidence < min_confidence or any(field in unresolved for field in REQUIRED_FIELDS):
+        return None, confidence, unresolved
+    return params, confidence, unresolved
@@ -0,0 +1,229 @@
+import json
+import re
+from typing import Dict, Iterator, Iterable, List, Tuple
+
+# 字符串内部只需要关心引号和反斜杠
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# 解析状态
+_BEFORE_OBJECT = 0
+_EXPECT_KEY = 1
+_IN_KEY = 2
+_EXPECT_COLON = 3
+_EXPECT_VALUE = 4
+_IN_VALUE = 5
+_AFTER_VALUE = 6
+_DONE = 7
+
+
+class JsonObjectStreamParser:
+    """
+    增量解析形如 {"path": "content", ...} 的 JSON 对象。
+
+    每次 feed 一段 LLM 输出的 token，返回本段中已经完整结束的 (path, content)。
+    解析器只缓存当前正在解析的那一对 key/value，内存占用以最大的单个文件为上限。
+    对象之前的多余文本（例如 ```json 代码块标记）会被忽略。
+    """
+
+    def __init__(self):
+        self._state = _BEFORE_OBJECT
+        self._buffer: list[str] = []
+        self._pending_escape = False
+        self._key = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> list[Tuple[str, str]]:
+        pairs = []
+        pos, size = 0, len(chunk)
+        while pos < size and self._state != _DONE:
+            state = self._state
+            if state in (_IN_KEY, _IN_VALUE):
+                pos, closed = self._consume_string(chunk, pos)
+                if not closed:
+                    break
+                text = self._decode()
+                if state == _IN_KEY:
+                    self._key = text
+                    self._state = _EXPECT_COLON
+                else:
+                    pairs.append((self._key, text))
+                    self._key = None
+                    self._state = _AFTER_VALUE
+                continue
+
+            ch = chunk[pos]
+            pos += 1
+            if ch.isspace():
+                continue
+            if state == _BEFORE_OBJECT:
+                if ch == "{":
+                    self._state = _EXPECT_KEY
+            elif state == _EXPECT_KEY:
+                if ch == '"':
+                    self._state = _IN_KEY
+                elif ch == "}":
+                    self._state = _DONE
+                else:
+                    raise ValueError(f"期望文件路径，实际为 {ch!r}")
+            elif state == _EXPECT_COLON:
+                if ch != ":":
+                    raise ValueError(f"期望 ':'，实际为 {ch!r}")
+                self._state = _EXPECT_VALUE
+            elif state == _EXPECT_VALUE:
+                if ch != '"':
+                    raise ValueError(f"文件 {self._key!r} 的内容不是字符串")
+                self._state = _IN_VALUE
+            elif state == _AFTER_VALUE:
+                if ch == ",":
+                    self._state = _EXPECT_KEY
+                elif ch == "}":
+                    self._state = _DONE
+                else:
+                    raise ValueError(f"期望 ',' 或 '}}'，实际为 {ch!r}")
+        return pairs
+
+    def _consume_string(self, chunk: str, pos: int) -> Tuple[int, bool]:
+        """把字符串内容追加到缓冲区，返回 (新位置, 字符串是否已结束)。"""
+        if self._pending_escape:
+            # 上一段以反斜杠结尾，当前段首字符属于转义序列
+            self._buffer.append(chunk[pos])
+            self._pending_escape = False
+            pos += 1
+        while True:
+            match = _STRING_SPECIAL.search(chunk, pos)
+            if match is None:
+                self._buffer.append(chunk[pos:])
+                return len(chunk), False
+            end = match.start()
+            if match.group() == '"':
+                self._buffer.append(chunk[pos:end])
+                return end + 1, True
+            # 反斜杠：连同下一个字符原样保留，交给 json 解码
+            if end + 1 >= len(chunk):
+                self._buffer.append(chunk[pos:])
+                self._pending_escape = True
+                return len(chunk), False
+            self._buffer.append(chunk[pos:end + 2])
+            pos = end + 2
+
+    def _decode(self) -> str:
+        raw = "".join(self._buffer)
+        self._buffer = []
+        return json.loads(f'"{raw}"')
+
+
+def iter_json_object_pairs(chunks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """从 token 流中逐个产出完整的 (path, content)。对象结束后仍读完整个流，不留下挂起的上游调用。"""
+    parser = JsonObjectStreamParser()
+    for chunk in chunks:
+        if parser.done:
+            # 对象之后的分片（例如只带 token 用量的最后一个分片）不再解析
+            continue
+        yield from parser.feed(chunk)
+
+
+try:
+    # 大响应优先使用更快的 orjson 解析，未安装时退回标准库
+    import orjson
+
+    def _fast_loads(text: str):
+        return orjson.loads(text)
+except ImportError:  # pragma: no cover - 取决于运行环境
+    def _fast_loads(text: str):
+        return json.loads(text)
+
+# 键的开始：  "path"  :  "
+_KEY_START = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"', re.S)
+# 字符串中未转义的引号
+_UNESCAPED_QUOTE = re.compile(r'(?<!\\)(?:\\\\)*"')
+# JSON 不允许的转义序列，例如 Windows 路径里的 \d
+_INVALID_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])')
+# 合法的值结束：引号之后是逗号加下一个键，或者对象结束
+_VALUE_END = re.compile(r'\s*(?:,\s*"|}|$)')
+
+
+class RecoveredFiles:
+    """容错解析的结果：成功恢复的文件，以及无法恢复内容的文件路径。"""
+
+    def __init__(self, files: Dict[str, str], unrecoverable: List[str]):
+        self.files = files
+        self.unrecoverable = unrecoverable
+
+
+def _decode_string(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+        # 修复非法转义后再试一次
+        repaired = _INVALID_ESCAPE.sub(r"\\\\", raw)
+        return json.loads(f'"{repaired}"', strict=False)
+
+
+def recover_json_object(text: str) -> RecoveredFiles:
+    """
+    从 {"path": "content", ...} 形式的响应中尽量恢复每一对 path/content。
+
+    先用快速 JSON 后端整体解析；失败时（截断、非法转义、内容中未转义的引号等）
+    逐个键扫描，能解码的内容全部保留，截断或无法解码的键记为 unrecoverable。
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            result = _fast_loads(text[start:end + 1])
+            if isinstance(result, dict):
+                files = {k: v for k, v in result.items() if isinstance(v, str)}
+                return RecoveredFiles(files, [k for k, v in result.items() if not isinstance(v, str)])
+        except ValueError:
+            pass
+
+    files: Dict[str, str] = {}
+    unrecoverable: List[str] = []
+    pos = max(start, 0)
+    while True:
+        key_match = _KEY_START.search(text, pos)
+        if key_match is None:
+            break
+        try:
+            key = _decode_string(key_match.group(1))
+        except ValueError:
+            pos = key_match.end()
+            continue
+
+        value_start = key_match.end()
+        value_end = None
+        # 找到第一个其后紧跟 ", 下一个键" 或 "}" 的未转义引号，容忍内容中未转义的引号
+        for quote in _UNESCAPED_QUOTE.finditer(text, value_start):
+            quote_pos = quote.end() - 1
+            if _VALUE_END.match(text, quote_pos + 1):
+                value_end = quote_pos
+                break
+        if value_end is None:
+            # 响应被截断，最后一个文件不完整
+            unrecoverable.append(key)
+            break
+
+        raw = text[value_start:value_end]
+        try:
+            files[key] = _decode_string(raw)
+        except ValueError:
+            # 内容中有未转义的引号时，把它们转义后再尝试
+            try:
+                files[key] = _decode_string(_UNESCAPED_QUOTE.sub(lambda m: m.group()[:-1] + '\\"', raw))
+            except ValueError:
+                unrecoverable.append(key)
+        pos = value_end + 1
+
+    return RecoveredFiles(files, [k for k in unrecoverable if k not in files])
+
+
+class RecoveringFilesParser:
+    """与 JsonOutputParser 用法一致的容错解析器，一个文件都恢复不了时才视为解析失败。"""
+
+    def parse(self, text: str) -> RecoveredFiles:
+        result = recover_json_object(text)
+        if not result.files:
+            raise ValueError(f"无法从响应中恢复任何文件（无法恢复: {result.unrecoverable}）")
+        return result
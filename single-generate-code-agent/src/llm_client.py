@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+# 单个 HTTP 请求的超时（秒），以及连接池大小
+LLM_REQUEST_TIMEOUT = float(os.getenv("CODEGEN_LLM_TIMEOUT", "120"))
+LLM_POOL_CONNECTIONS = int(os.getenv("CODEGEN_LLM_POOL_CONNECTIONS", "32"))
+
+# 按节点区分的单次 LLM 调用截止时间（秒），可用 CODEGEN_LLM_CALL_DEADLINES="parse_input=20,generate_files=300" 覆盖。
+# 截止时间约束的是每一次调用，不是整个节点：重试与按文件补生成的每一轮都各自计时
+DEFAULT_CALL_DEADLINES = {
+    "parse_input": 30.0,
+    "generate_structure": 60.0,
+    "generate_files": 300.0,
+    "generate_file_batch": 120.0,
+}
+
+# 调用在线程池中排队等待的上限（秒），线程池被超时后仍在后台运行的调用占满时直接失败，不无限等待
+LLM_QUEUE_TIMEOUT = float(os.getenv("CODEGEN_LLM_QUEUE_TIMEOUT", "5"))
+
+# 对冲请求：第一个请求的耗时超过该节点历史耗时的指定分位数后，再发一个相同的请求，取先返回的结果
+LLM_HEDGE_ENABLED = os.getenv("CODEGEN_LLM_HEDGE") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("CODEGEN_LLM_HEDGE_PERCENTILE", "0.95"))
+# 样本数不足时分位数不可靠，不发对冲请求
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("CODEGEN_LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 200
+
+
+class DeadlineExceeded(TimeoutError):
+    """LLM 调用超过截止时间或排队超时，不再重试。"""
+
+
+def parse_deadlines(text: Optional[str]) -> Dict[str, float]:
+    deadlines = dict(DEFAULT_CALL_DEADLINES)
+    for item in (text or "").split(","):
+        if "=" in item:
+            node, seconds = item.split("=", 1)
+            deadlines[node.strip()] = float(seconds)
+    return deadlines
+
+
+CALL_DEADLINES = parse_deadlines(os.getenv("CODEGEN_LLM_CALL_DEADLINES"))
+
+
+def make_http_clients(timeout: float = LLM_REQUEST_TIMEOUT, max_connections: int = LLM_POOL_CONNECTIONS):
+    """所有节点共享的 HTTP 连接池（同步 / 异步各一个），复用 TCP/TLS 连接。"""
+    import httpx
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return (httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout))
+
+
+class LatencyTracker:
+    """按节点保存最近的 LLM 调用耗时，用于计算对冲的触发阈值。"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, node: str, seconds: float):
+        with self._lock:
+            self._samples[node].append(seconds)
+
+    def percentile(self, node: str, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples[node])
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgedInvoker:
+    """
+    在线程池中执行 LLM 调用，强制截止时间，并按需发出对冲请求。
+    截止时间从调用开始执行时计算，排队等待另有上限 queue_timeout；
+    超时或已有结果时，仍在排队的请求会被取消，已经开始执行的同步调用无法中断，会在后台执行完毕后被丢弃。
+    """
+
+    def __init__(self, hedge: bool = LLM_HEDGE_ENABLED, percentile: float = LLM_HEDGE_PERCENTILE,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES, max_workers: int = LLM_POOL_CONNECTIONS,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.hedge = hedge
+        self.queue_timeout = queue_timeout
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _submit(self, fn: Callable[[], Any]):
+        """提交调用，返回 (future, 开始执行的事件, 记录开始时间的字典)。"""
+        running = threading.Event()
+        started: Dict[str, float] = {}
+
+        def run():
+            started["at"] = time.perf_counter()
+            running.set()
+            return fn()
+
+        return self._executor.submit(run), running, started
+
+    def invoke(self, fn: Callable[[], Any], node: str, deadline: Optional[float] = None,
+               on_hedge: Optional[Callable[[bool], None]] = None, hedge: bool = True) -> Any:
+        """
+        执行 fn，从调用真正开始执行起最多等待 deadline 秒；排队超过 min(queue_timeout, deadline) 秒仍未开始时抛出 DeadlineExceeded。
+        on_hedge(won) 在发出对冲请求且得到结果后回调，won 表示对冲请求先返回。
+        """
+        self._count(requests=1)
+        primary, running, started = self._submit(fn)
+        # 排队时间不超过 queue_timeout，也不超过本次调用的截止时间；cancel() 失败说明调用恰好已经开始执行，照常等待
+        queue_timeout = min(self.queue_timeout, deadline) if deadline else self.queue_timeout
+        if not running.wait(timeout=queue_timeout) and primary.cancel():
+            self._count(timeouts=1)
+            raise DeadlineExceeded(f"{node} 的 LLM 调用排队超过 {queue_timeout}s，线程池已满")
+        running.wait()
+        ends_at = started["at"] + deadline if deadline else None
+
+        def remaining() -> Optional[float]:
+            return None if ends_at is None else max(0.0, ends_at - time.perf_counter())
+
+        futures = [primary]
+        threshold = self.latency.percentile(node, self.percentile, self.min_samples) \
+            if self.hedge and hedge else None
+        if threshold is not None and (ends_at is None or started["at"] + threshold < ends_at):
+            done, _ = wait(futures, timeout=max(0.0, started["at"] + threshold - time.perf_counter()))
+            if not done:
+                self._count(hedged=1)
+                futures.append(self._submit(fn)[0])
+
+        error = None
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # 其中一个请求失败时继续等待另一个
+                        error = e
+                        continue
+                    self.latency.observe(node, time.perf_counter() - started["at"])
+                    if len(futures) > 1:
+                        won = future is not primary
+                        self._count(hedge_wins=1 if won else 0)
+                        if on_hedge is not None:
+                            on_hedge(won)
+                    return result
+        finally:
+            # 取消还在排队的请求（已经开始执行的同步调用无法中断，只能在后台结束后丢弃）
+            for future in pending:
+                future.cancel()
+
+        if error is not None and not pending:
+            raise error
+        self._count(timeouts=1)
+        raise DeadlineExceeded(f"{node} 的 LLM 调用超过截止时间 {deadline}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 4) if self.hedged else 0.0,
+        }
@@ -0,0 +1,177 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, fields
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# 节点耗时直方图的分桶（秒）
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_current_run: contextvars.ContextVar[Optional["NodeRun"]] = contextvars.ContextVar("codegen_node_run", default=None)
+
+
+@dataclass
+class NodeRun:
+    """一次节点执行的指标。"""
+    node: str
+    started_at: float
+    wall_seconds: float = 0.0
+    # 首个 token 的耗时：流式调用为收到第一个 token 的时间，非流式调用为整个响应的时间
+    ttft_seconds: Optional[float] = None
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    # 发出的对冲请求数，以及对冲请求先返回的次数
+    hedges: int = 0
+    hedge_wins: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    bytes_written: int = 0
+    error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **values):
+        # 写盘线程等其它线程也会更新同一个节点的指标
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def first_token(self, seconds: float):
+        with self._lock:
+            if self.ttft_seconds is None:
+                self.ttft_seconds = seconds
+
+    def to_dict(self) -> dict:
+        # asdict 会深拷贝 _lock 并失败，这里逐个字段取值
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name != "_lock"}
+
+
+def current_run() -> Optional[NodeRun]:
+    return _current_run.get()
+
+
+def record(**values):
+    """在当前节点的指标上累加，节点之外调用时忽略。"""
+    run = _current_run.get()
+    if run is not None:
+        run.add(**values)
+
+
+class MetricsRecorder:
+    """
+    包装图中的每个节点，记录耗时、首 token 时间、token 用量、重试次数、缓存命中与写盘字节数。
+    每次节点执行结束后追加一行 JSON 到 jsonl_path，并刷新 Prometheus 文本格式文件 prom_path。
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, prom_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self._lock = threading.Lock()
+        self._counters: Dict[tuple, float] = defaultdict(float)
+        self._buckets: Dict[tuple, int] = defaultdict(int)
+
+    def instrument(self, node: str, fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(state, *args, **kwargs):
+            run = NodeRun(node=node, started_at=time.time())
+            token = _current_run.set(run)
+            started = time.perf_counter()
+            try:
+                return fn(state, *args, **kwargs)
+            except Exception as e:
+                run.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                run.wall_seconds = time.perf_counter() - started
+                _current_run.reset(token)
+                self.record(run)
+
+        return wrapper
+
+    def record(self, run: NodeRun):
+        with self._lock:
+            self._observe(run)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run.to_dict(), ensure_ascii=False) + "\n")
+            if self.prom_path:
+                self._write_prometheus()
+
+    def _observe(self, run: NodeRun):
+        node = run.node
+        counters = self._counters
+        counters[("codegen_node_runs_total", node, "")] += 1
+        counters[("codegen_node_duration_seconds_sum", node, "")] += run.wall_seconds
+        if run.error:
+            counters[("codegen_node_errors_total", node, "")] += 1
+        if run.ttft_seconds is not None:
+            counters[("codegen_llm_ttft_seconds_sum", node, "")] += run.ttft_seconds
+            counters[("codegen_llm_ttft_seconds_count", node, "")] += 1
+        counters[("codegen_llm_calls_total", node, "")] += run.llm_calls
+        counters[("codegen_llm_tokens_total", node, "prompt")] += run.prompt_tokens
+        counters[("codegen_llm_tokens_total", node, "completion")] += run.completion_tokens
+        counters[("codegen_llm_retries_total", node, "")] += run.retries
+        counters[("codegen_llm_hedges_total", node, "")] += run.hedges
+        counters[("codegen_llm_hedge_wins_total", node, "")] += run.hedge_wins
+        counters[("codegen_llm_cache_total", node, "hit")] += run.cache_hits
+        counters[("codegen_llm_cache_total", node, "miss")] += run.cache_misses
+        counters[("codegen_bytes_written_total", node, "")] += run.bytes_written
+        for bucket in DURATION_BUCKETS:
+            if run.wall_seconds <= bucket:
+                self._buckets[(node, bucket)] += 1
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            return self._render_prometheus()
+
+    def _render_prometheus(self) -> str:
+        label_names = {
+            "codegen_llm_tokens_total": "kind",
+            "codegen_llm_cache_total": "result",
+        }
+        lines = []
+        current = None
+        for (name, node, extra), value in sorted(self._counters.items()):
+            if name == "codegen_node_duration_seconds_sum":
+                continue
+            if name != current:
+                current = name
+                metric_type = "counter" if name.endswith("_total") else "untyped"
+                lines.append(f"# TYPE {name} {metric_type}")
+            labels = f'node="{node}"'
+            if extra:
+                labels += f',{label_names[name]}="{extra}"'
+            lines.append(f"{name}{{{labels}}} {value:g}")
+
+        # 节点耗时直方图，同一指标族的样本需要连续输出
+        lines.append("# TYPE codegen_node_duration_seconds histogram")
+        nodes = sorted({node for (name, node, _) in self._counters if name == "codegen_node_runs_total"})
+        for node in nodes:
+            for bucket in DURATION_BUCKETS:
+                lines.append(f'codegen_node_duration_seconds_bucket{{node="{node}",le="{bucket:g}"}} '
+                             f'{self._buckets[(node, bucket)]}')
+            count = self._counters[("codegen_node_runs_total", node, "")]
+            total = self._counters[("codegen_node_duration_seconds_sum", node, "")]
+            lines.append(f'codegen_node_duration_seconds_bucket{{node="{node}",le="+Inf"}} {count:g}')
+            lines.append(f'codegen_node_duration_seconds_sum{{node="{node}"}} {total:g}')
+            lines.append(f'codegen_node_duration_seconds_count{{node="{node}"}} {count:g}')
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus(self):
+        path = Path(self.prom_path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self._render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# 默认的全局记录器，通过环境变量指定输出位置
+METRICS = MetricsRecorder(
+    jsonl_path=os.getenv("CODEGEN_METRICS_JSONL"),
+    prom_path=os.getenv("CODEGEN_METRICS_PROM"),
+)
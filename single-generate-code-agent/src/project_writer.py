@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# 清单文件放在项目目录旁边，不混入生成的项目本身
+MANIFEST_SUFFIX = ".codegen-manifest.json"
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def manifest_path(project_path: Path) -> Path:
+    return project_path.parent / f".{project_path.name}{MANIFEST_SUFFIX}"
+
+
+class ProjectWriter:
+    """
+    基于内容哈希清单的增量写盘。
+
+    清单记录上一次写入的每个文件的 sha256，再次生成时：
+    - 新增、内容变化或在磁盘上丢失的文件才会写入
+    - 上一次生成过、本次不再生成的文件会被删除
+    - 内容没有变化的文件保持不动（不影响 IDE 索引与构建缓存）
+    dry_run=True 时只计算差异，不做任何磁盘修改。
+    路径来自 LLM 输出，解析后不在项目目录内的路径（../、绝对路径等）一律跳过，不写入也不删除。
+    """
+
+    def __init__(self, project_path: Path, max_workers: int = 8, dry_run: bool = False):
+        self.project_path = project_path
+        self.root = project_path.resolve()
+        self.max_workers = max_workers
+        self.dry_run = dry_run
+        self.manifest_file = manifest_path(project_path)
+        self.previous = self._load_manifest()
+        self._created_dirs: set[Path] = set()
+        self._dir_lock = threading.Lock()
+        # 实际写入磁盘的字节数（内容未变化而跳过的文件不计入）
+        self.bytes_written = 0
+
+    def _load_manifest(self) -> Dict[str, str]:
+        if not self.manifest_file.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_file.read_text(encoding="utf-8")).get("files", {})
+        except (OSError, ValueError) as e:
+            print("[清单] 读取失败，按全量写入处理:", e)
+            return {}
+
+    def ensure_dir(self, path: Path):
+        # 同一目录只创建一次，多个写盘线程共享已创建目录的记录
+        if self.dry_run or path in self._created_dirs:
+            return
+        with self._dir_lock:
+            if path not in self._created_dirs:
+                path.mkdir(parents=True, exist_ok=True)
+                self._created_dirs.add(path)
+
+    def resolve(self, path: str) -> Optional[Path]:
+        """返回 path 在项目目录内的绝对路径；落在项目目录之外时返回 None。"""
+        p = (self.root / path).resolve()
+        return p if self.root in p.parents else None
+
+    def is_safe(self, path: str) -> bool:
+        if self.resolve(path) is not None:
+            return True
+        print(f"[写盘] 跳过项目目录之外的路径: {path}")
+        return False
+
+    def is_unchanged(self, path: str, digest: str) -> bool:
+        p = self.resolve(path)
+        return self.previous.get(path) == digest and p is not None and p.is_file()
+
+    def write_file(self, path: str, content: str) -> Tuple[str, bool]:
+        """写入单个文件，内容未变化时跳过。返回 (内容哈希, 是否实际写入)。路径不在项目目录内时抛出 ValueError。"""
+        p = self.resolve(path)
+        if p is None:
+            raise ValueError(f"路径不在项目目录内: {path}")
+        digest = content_hash(content)
+        if self.is_unchanged(path, digest):
+            return digest, False
+        if not self.dry_run:
+            self.ensure_dir(p.parent)
+            data = content.encode("utf-8")
+            p.write_bytes(data)
+            with self._dir_lock:
+                self.bytes_written += len(data)
+        return digest, True
+
+    def diff(self, hashes: Dict[str, str], prune: bool = True) -> Dict[str, list[str]]:
+        report = {"added": [], "changed": [], "unchanged": [], "removed": []}
+        hashes = {path: digest for path, digest in hashes.items() if self.is_safe(path)}
+        for path, digest in hashes.items():
+            if path not in self.previous:
+                report["added"].append(path)
+            elif self.is_unchanged(path, digest):
+                report["unchanged"].append(path)
+            else:
+                report["changed"].append(path)
+        if prune:
+            report["removed"] = [path for path in self.previous
+                                 if path not in hashes and self.resolve(path) is not None]
+        return {key: sorted(paths) for key, paths in report.items()}
+
+    def sync(self, files: Dict[str, str], written_hashes: Optional[Dict[str, str]] = None,
+             keep: Iterable[str] = (), prune: bool = True) -> Dict[str, list[str]]:
+        """
+        将 files 同步到磁盘：通过线程池批量写入新增/变化的文件，删除不再生成的文件，最后更新清单。
+        written_hashes 为已经在别处写入（如流式写盘）的文件哈希，只参与清单与差异计算。
+        keep 为本次生成失败的文件，保留磁盘上的旧文件及其清单记录；
+        prune=False 时不删除任何旧文件，清单保留所有旧记录（本次生成不完整时使用）。
+        """
+        files = {path: content for path, content in files.items() if self.is_safe(path)}
+        written_hashes = {path: digest for path, digest in (written_hashes or {}).items() if self.is_safe(path)}
+        hashes = {**written_hashes, **{path: content_hash(content) for path, content in files.items()}}
+        report = self.diff(hashes, prune=prune)
+        keep = set(keep)
+        report["removed"] = [path for path in report["removed"] if path not in keep]
+        # 未删除的旧文件继续记录在清单中，下次生成时仍能识别为已存在的文件
+        kept = {path: digest for path, digest in self.previous.items()
+                if path not in hashes and path not in report["removed"] and self.resolve(path) is not None}
+        if self.dry_run:
+            return report
+
+        to_write = set(report["added"]) | set(report["changed"])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(lambda path: self.write_file(path, files[path]),
+                          [path for path in files if path in to_write]))
+
+        self.remove(report["removed"])
+        self.save_manifest({**kept, **hashes})
+        return report
+
+    def remove(self, paths: Iterable[str]):
+        for path in paths:
+            p = self.resolve(path)
+            if p is None:
+                continue
+            if p.is_file():
+                p.unlink()
+            # 清理因删除文件而变空的目录，止步于项目根目录
+            parent = p.parent
+            while self.root in parent.parents and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+    def save_manifest(self, hashes: Dict[str, str]):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"files": hashes}, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.manifest_file)
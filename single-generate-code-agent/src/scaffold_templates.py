@@ -0,0 +1,269 @@
+from string import Template
+from typing import Any, Callable, Dict
+
+# 按 jdk 版本选择 Spring Boot 版本：Spring Boot 3 需要 jdk17 及以上
+SPRING_BOOT_2 = "2.7.18"
+SPRING_BOOT_3 = "3.2.5"
+
+POM_SPRING_BOOT = Template("""<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0"
+         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 https://maven.apache.org/xsd/maven-4.0.0.xsd">
+    <modelVersion>4.0.0</modelVersion>
+
+    <parent>
+        <groupId>org.springframework.boot</groupId>
+        <artifactId>spring-boot-starter-parent</artifactId>
+        <version>${spring_boot_version}</version>
+        <relativePath/>
+    </parent>
+
+    <groupId>${group_id}</groupId>
+    <artifactId>${artifact_id}</artifactId>
+    <version>0.0.1-SNAPSHOT</version>
+    <name>${artifact_id}</name>
+
+    <properties>
+        <java.version>${jdk_version}</java.version>
+    </properties>
+
+    <dependencies>
+        <dependency>
+            <groupId>org.springframework.boot</groupId>
+            <artifactId>spring-boot-starter-web</artifactId>
+        </dependency>
+        <dependency>
+            <groupId>org.springframework.boot</groupId>
+            <artifactId>spring-boot-starter-test</artifactId>
+            <scope>test</scope>
+        </dependency>
+    </dependencies>
+
+    <build>
+        <plugins>
+            <plugin>
+                <groupId>org.springframework.boot</groupId>
+                <artifactId>spring-boot-maven-plugin</artifactId>
+            </plugin>
+        </plugins>
+    </build>
+</project>
+""")
+
+POM_PLAIN = Template("""<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0"
+         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+         xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 https://maven.apache.org/xsd/maven-4.0.0.xsd">
+    <modelVersion>4.0.0</modelVersion>
+
+    <groupId>${group_id}</groupId>
+    <artifactId>${artifact_id}</artifactId>
+    <version>0.0.1-SNAPSHOT</version>
+    <packaging>jar</packaging>
+
+    <properties>
+        <maven.compiler.source>${jdk_version}</maven.compiler.source>
+        <maven.compiler.target>${jdk_version}</maven.compiler.target>
+        <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
+    </properties>
+
+    <dependencies>
+        <dependency>
+            <groupId>org.junit.jupiter</groupId>
+            <artifactId>junit-jupiter</artifactId>
+            <version>5.10.2</version>
+            <scope>test</scope>
+        </dependency>
+    </dependencies>
+</project>
+""")
+
+BUILD_GRADLE_SPRING_BOOT = Template("""plugins {
+    id 'java'
+    id 'org.springframework.boot' version '${spring_boot_version}'
+    id 'io.spring.dependency-management' version '1.1.4'
+}
+
+group = '${group_id}'
+version = '0.0.1-SNAPSHOT'
+
+java {
+    sourceCompatibility = '${jdk_version}'
+}
+
+repositories {
+    mavenCentral()
+}
+
+dependencies {
+    implementation 'org.springframework.boot:spring-boot-starter-web'
+    testImplementation 'org.springframework.boot:spring-boot-starter-test'
+}
+
+tasks.named('test') {
+    useJUnitPlatform()
+}
+""")
+
+BUILD_GRADLE_PLAIN = Template("""plugins {
+    id 'java'
+}
+
+group = '${group_id}'
+version = '0.0.1-SNAPSHOT'
+
+java {
+    sourceCompatibility = '${jdk_version}'
+}
+
+repositories {
+    mavenCentral()
+}
+
+dependencies {
+    testImplementation 'org.junit.jupiter:junit-jupiter:5.10.2'
+}
+
+tasks.named('test') {
+    useJUnitPlatform()
+}
+""")
+
+SETTINGS_GRADLE = Template("""rootProject.name = '${artifact_id}'
+""")
+
+APPLICATION_JAVA = Template("""package ${base_package};
+
+import org.springframework.boot.SpringApplication;
+import org.springframework.boot.autoconfigure.SpringBootApplication;
+
+@SpringBootApplication
+public class Application {
+
+    public static void main(String[] args) {
+        SpringApplication.run(Application.class, args);
+    }
+}
+""")
+
+APPLICATION_TESTS_JAVA = Template("""package ${base_package};
+
+import org.junit.jupiter.api.Test;
+import org.springframework.boot.test.context.SpringBootTest;
+
+@SpringBootTest
+class ApplicationTests {
+
+    @Test
+    void contextLoads() {
+    }
+}
+""")
+
+APPLICATION_YML = Template("""server:
+  port: 8080
+
+spring:
+  application:
+    name: ${artifact_id}
+""")
+
+PACKAGE_INFO_JAVA = Template("""/**
+ * ${module} 模块
+ */
+package ${base_package}.${module};
+""")
+
+DOCKERFILE = Template("""FROM eclipse-temurin:${jdk_version}-jre
+WORKDIR /app
+COPY ${jar_path} app.jar
+EXPOSE 8080
+ENTRYPOINT ["java", "-jar", "/app/app.jar"]
+""")
+
+GITIGNORE = """target/
+build/
+.gradle/
+.idea/
+*.iml
+.vscode/
+"""
+
+
+def _context(params: Dict[str, Any]) -> Dict[str, str]:
+    jdk_version = str(params.get("jdkVersion") or "17")
+    artifact_id = params.get("projectName") or "generate-code-project"
+    group_id = params.get("company_package") or "com.nq"
+    build_tool = params.get("build_tool") or "maven"
+    return {
+        "jdk_version": jdk_version,
+        "artifact_id": artifact_id,
+        "group_id": group_id,
+        "base_package": group_id,
+        "spring_boot_version": SPRING_BOOT_3 if jdk_version.isdigit() and int(jdk_version) >= 17 else SPRING_BOOT_2,
+        "jar_path": "target/*.jar" if build_tool == "maven" else "build/libs/*.jar",
+    }
+
+
+def _java_dir(root: str, base_package: str) -> str:
+    return f"{root}/{base_package.replace('.', '/')}"
+
+
+def _render_maven(params: Dict[str, Any], ctx: Dict[str, str]) -> Dict[str, str]:
+    template = POM_SPRING_BOOT if params.get("framework") == "spring_boot" else POM_PLAIN
+    return {"pom.xml": template.substitute(ctx)}
+
+
+def _render_gradle(params: Dict[str, Any], ctx: Dict[str, str]) -> Dict[str, str]:
+    template = BUILD_GRADLE_SPRING_BOOT if params.get("framework") == "spring_boot" else BUILD_GRADLE_PLAIN
+    return {"build.gradle": template.substitute(ctx), "settings.gradle": SETTINGS_GRADLE.substitute(ctx)}
+
+
+def _render_spring_boot(params: Dict[str, Any], ctx: Dict[str, str]) -> Dict[str, str]:
+    files = {
+        f"{_java_dir('src/main/java', ctx['base_package'])}/Application.java": APPLICATION_JAVA.substitute(ctx),
+        "src/main/resources/application.yml": APPLICATION_YML.substitute(ctx),
+    }
+    if "unit_test" in (params.get("needs") or []):
+        files[f"{_java_dir('src/test/java', ctx['base_package'])}/ApplicationTests.java"] = \
+            APPLICATION_TESTS_JAVA.substitute(ctx)
+    return files
+
+
+# 构建工具与框架对应的模板渲染函数，未登记的组合交给 LLM 生成
+BUILD_TOOL_TEMPLATES: Dict[str, Callable[[Dict[str, Any], Dict[str, str]], Dict[str, str]]] = {
+    "maven": _render_maven,
+    "gradle": _render_gradle,
+}
+
+FRAMEWORK_TEMPLATES: Dict[str, Callable[[Dict[str, Any], Dict[str, str]], Dict[str, str]]] = {
+    "spring_boot": _render_spring_boot,
+}
+
+
+def render_templates(params: Dict[str, Any]) -> Dict[str, str]:
+    """
+    根据 params 渲染固定的样板文件（构建文件、启动类、配置、Dockerfile 等），
+    返回 {相对路径: 文件内容}。结果只依赖 params，相同参数总是得到相同的文件。
+    """
+    ctx = _context(params)
+    files: Dict[str, str] = {".gitignore": GITIGNORE}
+
+    build_renderer = BUILD_TOOL_TEMPLATES.get(params.get("build_tool"))
+    if build_renderer:
+        files.update(build_renderer(params, ctx))
+
+    framework_renderer = FRAMEWORK_TEMPLATES.get(params.get("framework"))
+    if framework_renderer:
+        files.update(framework_renderer(params, ctx))
+
+    for module in params.get("modules") or []:
+        module_package = str(module).strip().replace("-", "_").lower()
+        if module_package.isidentifier():
+            files[f"{_java_dir('src/main/java', ctx['base_package'])}/{module_package}/package-info.java"] = \
+                PACKAGE_INFO_JAVA.substitute(ctx, module=module_package)
+
+    if build_renderer and "docker" in (params.get("needs") or []):
+        files["Dockerfile"] = DOCKERFILE.substitute(ctx)
+
+    return files
@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from agent import builder_workflow, llm_invoker, merge_files, merge_list, FILE_MODE_PER_FILE, MAX_CONCURRENCY
+from metrics import METRICS
+
+# 同时处理的生成请求上限，以及排队等待的最长时间（秒）
+SERVER_MAX_CONCURRENCY = int(os.getenv("CODEGEN_SERVER_MAX_CONCURRENCY", "16"))
+SERVER_QUEUE_TIMEOUT = float(os.getenv("CODEGEN_SERVER_QUEUE_TIMEOUT", "30"))
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+# 与图中 state 的 reducer 一致：并发节点的更新需要合并，而不是互相覆盖
+STATE_REDUCERS = {
+    "file_sources": merge_files,
+    "streamed_files": merge_files,
+    "failed_files": merge_list,
+    "fallback_nodes": merge_list,
+}
+
+
+class GenerateRequest(BaseModel):
+    user_input: str
+    use_templates: Optional[bool] = None
+
+
+class GenerationService:
+    """
+    常驻进程中的生成服务：图只编译一次，所有请求共享，
+    通过 ainvoke / astream 让多个请求在同一个事件循环中并发执行。
+    """
+
+    def __init__(self, max_concurrency: int = SERVER_MAX_CONCURRENCY, queue_timeout: float = SERVER_QUEUE_TIMEOUT):
+        self.app = builder_workflow(file_mode=FILE_MODE_PER_FILE)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.completed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def initial_state(request: GenerateRequest) -> Dict[str, Any]:
+        # 服务模式只在内存中生成，不读写本地磁盘
+        return {"user_input": request.user_input, "use_templates": request.use_templates, "in_memory": True}
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="生成服务繁忙，请稍后重试")
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    async def stream_events(self, request: GenerateRequest) -> AsyncIterator[bytes]:
+        """逐节点输出进度事件（NDJSON），最后输出生成结果摘要。并发许可由 ReleasingStreamingResponse 释放。"""
+        started = time.perf_counter()
+        final_state: Dict[str, Any] = {}
+        try:
+            async for event in self.app.astream(self.initial_state(request),
+                                                config={"max_concurrency": MAX_CONCURRENCY},
+                                                stream_mode="updates"):
+                for node, update in event.items():
+                    if isinstance(update, dict):
+                        for key, value in update.items():
+                            if key == "files":
+                                continue
+                            reducer = STATE_REDUCERS.get(key)
+                            final_state[key] = reducer(final_state.get(key), value) if reducer else value
+                        files = update.get("files") or {}
+                    else:
+                        files = {}
+                    yield _ndjson({
+                        "event": "node",
+                        "node": node,
+                        "elapsed": round(time.perf_counter() - started, 3),
+                        "files": sorted(files),
+                    })
+            yield _ndjson({
+                "event": "done",
+                "elapsed": round(time.perf_counter() - started, 3),
+                "params": final_state.get("params"),
+                "file_sources": final_state.get("file_sources"),
+                "failed_files": final_state.get("failed_files"),
+                "output": final_state.get("output"),
+            })
+        except Exception as e:
+            yield _ndjson({"event": "error", "error": f"{type(e).__name__}: {e}"})
+
+    async def generate_zip(self, request: GenerateRequest) -> tuple[str, bytes]:
+        try:
+            final_state = await self.app.ainvoke(self.initial_state(request),
+                                                 config={"max_concurrency": MAX_CONCURRENCY})
+        finally:
+            self.release()
+        files = final_state.get("files") or {}
+        if not files:
+            raise HTTPException(status_code=502, detail=final_state.get("output") or "未生成任何文件")
+        project_name = (final_state.get("params") or {}).get("projectName") or "generate_project"
+        return project_name, build_zip(project_name, files)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": self.in_flight, "completed": self.completed, "max_concurrency": self.max_concurrency}
+
+
+class ReleasingStreamingResponse(StreamingResponse):
+    """
+    响应结束时释放并发许可：不论正常结束、客户端在第一个分片前断开，还是发送响应头失败。
+    许可不能只在响应体生成器里释放，生成器从未开始迭代时其 finally 不会执行。
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+def _ndjson(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def build_zip(project_name: str, files: Dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path, content in sorted(files.items()):
+            zf.writestr(f"{project_name}/{path}", content)
+    return buffer.getvalue()
+
+
+def _iter_chunks(data: bytes):
+    view = memoryview(data)
+    for offset in range(0, len(view), ZIP_CHUNK_SIZE):
+        yield bytes(view[offset:offset + ZIP_CHUNK_SIZE])
+
+
+def create_app(max_concurrency: int = SERVER_MAX_CONCURRENCY) -> FastAPI:
+    api = FastAPI(title="single-generate-code-agent")
+    service: Dict[str, GenerationService] = {}
+
+    @api.on_event("startup")
+    async def startup():
+        # 在事件循环中创建服务，保证信号量绑定到正确的循环
+        service["instance"] = GenerationService(max_concurrency=max_concurrency)
+
+    @api.post("/generate")
+    async def generate(request: GenerateRequest):
+        svc = service["instance"]
+        await svc.acquire()
+        try:
+            return ReleasingStreamingResponse(svc.stream_events(request), svc.release,
+                                              media_type="application/x-ndjson")
+        except BaseException:
+            svc.release()
+            raise
+
+    @api.post("/generate/zip")
+    async def generate_zip(request: GenerateRequest):
+        svc = service["instance"]
+        await svc.acquire()
+        project_name, data = await svc.generate_zip(request)
+        return StreamingResponse(
+            _iter_chunks(data),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{project_name}.zip"'},
+        )
+
+    @api.get("/metrics")
+    async def metrics():
+        # Prometheus 文本格式的逐节点指标
+        return PlainTextResponse(METRICS.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    @api.get("/health")
+    async def health():
+        return {"status": "ok", **service["instance"].stats(), "llm": llm_invoker.stats()}
+
+    return api
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='以 HTTP 服务方式运行 Java 项目生成 Agent。')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口（默认: 8000）')
+    parser.add_argument('--max-concurrency', type=int, default=SERVER_MAX_CONCURRENCY,
+                        help=f'同时处理的生成请求上限（默认: {SERVER_MAX_CONCURRENCY}）')
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.max_concurrency), host=args.host, port=args.port)
@@ -0,0 +1,40 @@
+import pytest
+
+from fast_parse import extract_params, try_fast_path
+
+BASE = "帮我创建一个 Spring Boot + Maven 的 Java17 项目，项目名称为demo，包含 REST API 层、Service 层"
+MIN_CONFIDENCE = 0.8
+
+
+@pytest.mark.parametrize("suffix", [
+    "，不需要 docker",
+    "，docker 不需要",
+    "，docker 不用",
+    "，docker 也不要",
+    "，无需 docker",
+    "; skip docker.",
+    ". Don't add docker.",
+    ". Don’t add docker.",
+    ", do not add docker.",
+    ", without docker.",
+    ", docker is not needed.",
+])
+def test_negated_keyword_is_unresolved(suffix):
+    params, confidence, unresolved = extract_params(BASE + suffix)
+    assert "docker" not in params["needs"]
+    assert "needs" in unresolved
+    assert try_fast_path(BASE + suffix, MIN_CONFIDENCE)[0] is None
+
+
+def test_plain_keyword_takes_fast_path():
+    params, confidence, unresolved = try_fast_path(BASE + "，还要有单元测试和 Docker 支持。", MIN_CONFIDENCE)
+    assert params is not None
+    assert set(params["needs"]) >= {"docker", "unit_test"}
+    assert unresolved == []
+
+
+def test_negation_in_next_clause_does_not_leak_backwards():
+    params, _, unresolved = extract_params(BASE + "，需要 docker。单元测试不需要")
+    assert "docker" in params["needs"]
+    assert "unit_test" not in params["needs"]
+    assert "needs" in unresolved